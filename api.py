@@ -0,0 +1,224 @@
+# api.py
+"""API HTTP local das predições de elasticidade.
+
+Reaproveita os mesmos loaders do painel (modelo e snapshot dos dados, carregados
+uma vez por processo) e expõe:
+
+    GET  /health                 idade do modelo e dos dados
+    GET  /produtos               lista de produtos disponíveis
+    POST /predict                {"produto": ..., "variacao_percentual": ...}
+    POST /predict/batch          {"cenarios": [{"produto": ..., "variacao_percentual": ...}, ...]}
+    GET  /curve?produto=...&pontos=20
+
+Respostas em JSON por padrão, ou em Arrow IPC (stream) quando o cliente envia
+`Accept: application/vnd.apache.arrow.stream` (batch e curva).
+
+Uso: python api.py --port 8601
+"""
+import argparse
+import asyncio
+import hmac
+import json
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from aiohttp import web
+from elasticidade import (
+    get_model_loader, get_data_loader, get_interval_loader,
+    generate_price_sensitivity_curve, predict_scenarios,
+)
+
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+MAX_BATCH_SIZE = 5000
+MIN_CURVE_POINTS = 2
+MAX_CURVE_POINTS = 500
+
+
+def _json_default(value):
+    # Tipos numpy/pandas que o json padrão não conhece
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+def json_response(data, status=200):
+    return web.json_response(data, status=status, dumps=lambda d: json.dumps(d, default=_json_default))
+
+def table_response(request, df):
+    """Responde com o DataFrame em Arrow IPC, se solicitado, ou em JSON (lista de registros)."""
+    if ARROW_MIME in request.headers.get("Accept", ""):
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return web.Response(body=sink.getvalue().to_pybytes(), content_type=ARROW_MIME)
+    # NaN (por exemplo, campos de produtos não encontrados em um lote) vira null: NaN não é JSON válido
+    return json_response(df.astype(object).where(df.notna(), None).to_dict(orient="records"))
+
+def current_data():
+    """Retorna o snapshot dos dados ou levanta 503 se ainda não houver snapshot válido."""
+    snapshot = get_data_loader().get()
+    if snapshot is None:
+        raise web.HTTPServiceUnavailable(text="Dados ainda não carregados.")
+    return snapshot
+
+def current_snapshot():
+    """Retorna (snapshot, model, model_columns, interval_models) ou levanta 503 se ainda não houver snapshot válido."""
+    model_value = get_model_loader().get()
+    snapshot = get_data_loader().get()
+    if model_value is None or snapshot is None:
+        raise web.HTTPServiceUnavailable(text="Modelo ou dados ainda não carregados.")
+    model, model_columns = model_value
+    return snapshot, model, model_columns, get_interval_loader().get() or {}
+
+async def read_json(request):
+    try:
+        body = await request.json()
+    except ValueError:
+        raise web.HTTPBadRequest(text="Corpo da requisição deve ser JSON.")
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(text="Corpo da requisição deve ser um objeto JSON.")
+    return body
+
+def _product_name(value):
+    # Nomes de produto chegam como texto; listas/objetos viram 400, não erro interno
+    if not isinstance(value, str):
+        raise TypeError("'produto' deve ser texto.")
+    return value
+
+async def run_blocking(request, fn, *args):
+    """Executa a inferência no pool de threads, sem bloquear o event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(request.app["executor"], fn, *args)
+
+# --- MIDDLEWARE ---
+
+@web.middleware
+async def auth_middleware(request, handler):
+    token = request.app["token"]
+    if token and request.path != "/health":
+        provided = request.headers.get("Authorization", "").encode("utf-8")
+        if not hmac.compare_digest(provided, f"Bearer {token}".encode("utf-8")):
+            raise web.HTTPUnauthorized(text="Token inválido.")
+    return await handler(request)
+
+# --- ENDPOINTS ---
+
+async def health(request):
+    status = {}
+    for loader in (get_model_loader(), get_data_loader()):
+        status[loader.name] = {
+            "carregado_em": loader.loaded_at.isoformat() if loader.loaded_at else None,
+            "idade_segundos": loader.age_seconds(),
+            "desatualizado": loader.is_stale,
+        }
+    return json_response(status)
+
+async def products(request):
+    # Só a lista de produtos: não depende do modelo nem dos quantis
+    return json_response(current_data().products)
+
+async def predict(request):
+    body = await read_json(request)
+    try:
+        product = _product_name(body["produto"])
+        price_change = float(body.get("variacao_percentual", 0))
+    except (KeyError, TypeError, ValueError):
+        raise web.HTTPBadRequest(text="Informe 'produto' e 'variacao_percentual'.")
+    snapshot, model, model_columns, interval_models = current_snapshot()
+    scenarios = await run_blocking(
+        request, predict_scenarios, snapshot, product, [price_change], model, model_columns, None, interval_models
+    )
+    if not scenarios:
+        raise web.HTTPNotFound(text=f"Produto não encontrado: {product}")
+    return json_response({"produto": product, **scenarios[0]})
+
+def _predict_batch(snapshot, model, model_columns, interval_models, scenarios):
+    # Agrupa por produto: uma única chamada ao modelo por produto
+    by_product = defaultdict(list)
+    for position, (product, price_change) in enumerate(scenarios):
+        by_product[product].append((position, price_change))
+
+    results = [None] * len(scenarios)
+    for product, items in by_product.items():
+        predicted = predict_scenarios(
+            snapshot, product, [p for _, p in items], model, model_columns, interval_models=interval_models
+        )
+        for (position, _), scenario in zip(items, predicted or [None] * len(items)):
+            results[position] = {"produto": product, **scenario} if scenario else {"produto": product}
+    return pd.DataFrame(results)
+
+async def predict_batch(request):
+    body = await read_json(request)
+    try:
+        scenarios = [
+            (_product_name(c["produto"]), float(c.get("variacao_percentual", 0))) for c in body["cenarios"]
+        ]
+    except (KeyError, TypeError, ValueError, AttributeError):
+        raise web.HTTPBadRequest(text="Informe 'cenarios' como lista de {'produto', 'variacao_percentual'}.")
+    if len(scenarios) > MAX_BATCH_SIZE:
+        raise web.HTTPRequestEntityTooLarge(max_size=MAX_BATCH_SIZE, actual_size=len(scenarios))
+    snapshot, model, model_columns, interval_models = current_snapshot()
+    result = await run_blocking(request, _predict_batch, snapshot, model, model_columns, interval_models, scenarios)
+    return table_response(request, result)
+
+async def curve(request):
+    product = request.query.get("produto")
+    try:
+        num_points = min(int(request.query.get("pontos", 20)), MAX_CURVE_POINTS)
+    except ValueError:
+        raise web.HTTPBadRequest(text="'pontos' deve ser um inteiro.")
+    if num_points < MIN_CURVE_POINTS:
+        raise web.HTTPBadRequest(text=f"'pontos' deve ser pelo menos {MIN_CURVE_POINTS}.")
+    if not product:
+        raise web.HTTPBadRequest(text="Informe 'produto'.")
+    snapshot, model, model_columns, interval_models = current_snapshot()
+    result = await run_blocking(
+        request, generate_price_sensitivity_curve, snapshot, product, model, model_columns, num_points,
+        None, interval_models
+    )
+    if result is None:
+        raise web.HTTPNotFound(text=f"Produto não encontrado: {product}")
+    return table_response(request, result)
+
+# --- APLICAÇÃO ---
+
+async def _warm_up(app):
+    # Carrega modelo, dados e quantis antes de aceitar a primeira requisição
+    loop = asyncio.get_running_loop()
+    for loader in (get_model_loader(), get_data_loader(), get_interval_loader()):
+        await loop.run_in_executor(app["executor"], loader.get)
+
+async def _shutdown(app):
+    app["executor"].shutdown(wait=False)
+
+def create_app(token=None, workers=4):
+    app = web.Application(middlewares=[auth_middleware], client_max_size=8 * 1024 ** 2)
+    app["token"] = token
+    app["executor"] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="predict")
+    app.on_startup.append(_warm_up)
+    app.on_cleanup.append(_shutdown)
+    app.add_routes([
+        web.get("/health", health),
+        web.get("/produtos", products),
+        web.post("/predict", predict),
+        web.post("/predict/batch", predict_batch),
+        web.get("/curve", curve),
+    ])
+    return app
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API local das predições de elasticidade.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8601)
+    parser.add_argument("--workers", type=int, default=4, help="Threads de inferência.")
+    parser.add_argument("--token", default=None, help="Token Bearer exigido dos clientes (opcional).")
+    args = parser.parse_args()
+
+    # keepalive_timeout mantém as conexões dos clientes abertas entre requisições
+    web.run_app(create_app(args.token, args.workers), host=args.host, port=args.port, keepalive_timeout=75)
@@ -1,9 +1,14 @@
 # auth.py
 import streamlit as st
-import bcrypt
+import hashlib
 from datetime import datetime, timedelta
 from google.cloud import bigquery
-from google.oauth2 import service_account
+import gcp_clients
+from user_cache import UserCache
+from password_hasher import PasswordHasher, HasherBusy
+from login_throttle import LoginThrottle
+import session_tokens
+from password_writer import PasswordWriteQueue
 
 # --- CONSTANTES DO BIGQUERY ---
 GCP_PROJECT_ID = "vaulted-zodiac-294702"
@@ -11,25 +16,73 @@ BQ_DATASET = "RBBR_DATA_SCIENCE"
 BQ_USERS_TABLE = "PAINEL_USERS"
 TABLE_ID = f"{GCP_PROJECT_ID}.{BQ_DATASET}.{BQ_USERS_TABLE}"
 
+# --- CONFIGURAÇÕES PADRÃO DE AUTENTICAÇÃO (sobrescritas pela seção [auth] dos segredos) ---
+AUTH_DEFAULTS = {
+    "bcrypt_rounds": 12,
+    "bcrypt_workers": 2,
+    "bcrypt_queue": 16,
+    "max_attempts_per_user": 5,
+    "user_window_seconds": 300,
+    "max_attempts_per_client": 20,
+    "client_window_seconds": 60,
+    "trusted_proxy_hops": 0,
+    "session_ttl_hours": 12,
+}
+
 # --- FUNÇÕES DE CONEXÃO E AUTENTICAÇÃO ---
 
-@st.cache_resource
 def get_bq_client():
-    """Inicializa e retorna um cliente BigQuery usando as credenciais do Streamlit."""
-    credentials_info = dict(st.secrets["gcp_service_account"])
-    credentials = service_account.Credentials.from_service_account_info(credentials_info)
-    return bigquery.Client(project=GCP_PROJECT_ID, credentials=credentials)
+    """Retorna o cliente BigQuery compartilhado (credenciais e pool HTTP únicos por processo)."""
+    return gcp_clients.get_bq_client(GCP_PROJECT_ID)
+
+def get_auth_setting(name):
+    """Lê uma configuração de autenticação dos segredos, com fallback para o padrão."""
+    try:
+        return type(AUTH_DEFAULTS[name])(st.secrets["auth"][name])
+    except Exception:
+        return AUTH_DEFAULTS[name]
+
+@st.cache_resource
+def get_password_hasher():
+    """Pool de bcrypt compartilhado pelo processo."""
+    return PasswordHasher(
+        rounds=get_auth_setting("bcrypt_rounds"),
+        max_workers=get_auth_setting("bcrypt_workers"),
+        max_queue=get_auth_setting("bcrypt_queue"),
+    )
+
+@st.cache_resource
+def get_login_throttles():
+    """Limitadores de tentativas por usuário e por cliente, compartilhados pelo processo."""
+    return (
+        LoginThrottle(get_auth_setting("max_attempts_per_user"), get_auth_setting("user_window_seconds")),
+        LoginThrottle(get_auth_setting("max_attempts_per_client"), get_auth_setting("client_window_seconds")),
+    )
 
 def hash_password(password):
     """Gera o hash de uma senha."""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    return get_password_hasher().hash(password)
 
 def check_password(password, hashed_password):
     """Verifica se a senha corresponde ao hash."""
-    # O hash do BigQuery vem como bytes, então decodificamos
-    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+    # O hash do BigQuery vem como string, então codificamos antes de comparar
+    return get_password_hasher().check(password, hashed_password)
 
-def get_user_data(username):
+def fetch_user_rows(since=None):
+    """Busca os usuários da tabela do BigQuery (apenas os alterados desde `since`, se informado)."""
+    client = get_bq_client()
+    query = f"""
+        SELECT USERNAME, PASSWORD_HASH, LAST_RESET_DATE, FIRST_LOGIN
+        FROM `{TABLE_ID}`
+    """
+    query_parameters = []
+    if since is not None:
+        query += " WHERE LAST_RESET_DATE >= @since"
+        query_parameters.append(bigquery.ScalarQueryParameter("since", "TIMESTAMP", since))
+    job_config = bigquery.QueryJobConfig(query_parameters=query_parameters)
+    return list(client.query(query, job_config=job_config))
+
+def fetch_user_data(username):
     """Busca os dados de um usuário na tabela do BigQuery."""
     client = get_bq_client()
     query = f"""
@@ -50,37 +103,95 @@ def get_user_data(username):
         return results[0]
     return None
 
-def update_password(username, new_password):
-    """Atualiza a senha do usuário e a data de reset no BigQuery."""
+@st.cache_resource
+def get_user_cache():
+    """Cache de usuários compartilhado pelo processo."""
+    return UserCache(fetch_user_rows, fetch_user_data)
+
+def get_user_data(username):
+    """Busca os dados de um usuário, servidos do cache local sempre que possível."""
+    return get_user_cache().get(username)
+
+def write_password_updates(updates):
+    """Grava um lote de (USERNAME, PASSWORD_HASH) com um único MERGE.
+
+    O LAST_RESET_DATE vem do relógio do BigQuery (CURRENT_TIMESTAMP) e é lido
+    de volta no mesmo script; retorna {USERNAME: LAST_RESET_DATE}.
+    """
     client = get_bq_client()
-    new_hash = hash_password(new_password).decode('utf-8') # Decodifica para salvar como string
-    
     query = f"""
-        UPDATE `{TABLE_ID}`
-        SET 
-            PASSWORD_HASH = @new_hash,
+        MERGE `{TABLE_ID}` T
+        USING (SELECT * FROM UNNEST(@updates)) S
+        ON T.USERNAME = S.USERNAME
+        WHEN MATCHED THEN UPDATE SET
+            PASSWORD_HASH = S.PASSWORD_HASH,
             LAST_RESET_DATE = CURRENT_TIMESTAMP(),
-            FIRST_LOGIN = FALSE
-        WHERE USERNAME = @username
+            FIRST_LOGIN = FALSE;
+
+        SELECT USERNAME, LAST_RESET_DATE
+        FROM `{TABLE_ID}`
+        WHERE USERNAME IN (SELECT USERNAME FROM UNNEST(@updates));
     """
     job_config = bigquery.QueryJobConfig(
         query_parameters=[
-            bigquery.ScalarQueryParameter("new_hash", "STRING", new_hash),
-            bigquery.ScalarQueryParameter("username", "STRING", username),
+            bigquery.ArrayQueryParameter("updates", "STRUCT", [
+                bigquery.StructQueryParameter(
+                    None,
+                    bigquery.ScalarQueryParameter("USERNAME", "STRING", username),
+                    bigquery.ScalarQueryParameter("PASSWORD_HASH", "STRING", password_hash),
+                )
+                for username, password_hash in updates
+            ]),
         ]
     )
-    client.query(query, job_config=job_config).result() # .result() espera a query terminar
+    # Em um script, o resultado do job é o da última instrução (o SELECT)
+    rows = client.query(query, job_config=job_config).result()
+    return {row.USERNAME: row.LAST_RESET_DATE for row in rows}
+
+@st.cache_resource
+def get_password_write_queue():
+    """Fila de gravação de senhas (group commit) compartilhada pelo processo."""
+    user_cache = get_user_cache()
+    return PasswordWriteQueue(
+        write_password_updates,
+        on_written=lambda username, password_hash, last_reset_date: user_cache.put(
+            username, (password_hash, last_reset_date, False)
+        ),
+    )
+
+def update_password(username, new_password):
+    """Atualiza a senha do usuário e a data de reset.
+
+    Resets simultâneos são agrupados em um único MERGE, mas a função só retorna
+    depois que a nova senha foi gravada no BigQuery (e levanta exceção se a
+    gravação falhar). Após a gravação, o novo hash vale imediatamente para os
+    logins servidos por este processo.
+    """
+    new_hash = hash_password(new_password).decode('utf-8') # Decodifica para salvar como string
+    get_password_write_queue().write(username, new_hash)
+
+def verify_login(username, password, client_id=None):
+    """Verifica o login do usuário a partir do cache de usuários."""
+    # Limites de tentativas são checados antes de qualquer trabalho de bcrypt
+    user_throttle, client_throttle = get_login_throttles()
+    if client_id and not client_throttle.allow(client_id):
+        return "THROTTLED"
+    if not user_throttle.allow(username):
+        return "THROTTLED"
 
-def verify_login(username, password):
-    """Verifica o login do usuário consultando o BigQuery."""
     user_data = get_user_data(username)
     if not user_data:
         return "INVALID"
 
     password_hash, last_reset_date, first_login = user_data
 
-    if not check_password(password, password_hash):
-        return "INVALID"
+    try:
+        if not check_password(password, password_hash):
+            return "INVALID"
+    except HasherBusy:
+        return "BUSY"
+
+    user_throttle.reset(username)
 
     if first_login is True:
         return "FORCE_RESET_INITIAL"
@@ -89,4 +200,67 @@ def verify_login(username, password):
     if datetime.now(last_reset_date.tzinfo) > last_reset_date + timedelta(days=15):
         return "FORCE_RESET_EXPIRED"
         
-    return "SUCCESS"
\ No newline at end of file
+    return "SUCCESS"
+
+# --- RETOMADA DE SESSÃO (TOKEN ASSINADO NO NAVEGADOR) ---
+
+@st.cache_resource
+def get_session_secret():
+    """Chave HMAC dos tokens de sessão; derivada da conta de serviço se não configurada."""
+    try:
+        return str(st.secrets["auth"]["session_secret"]).encode('utf-8')
+    except Exception:
+        private_key = gcp_clients.load_service_account_info()["private_key"]
+        return hashlib.sha256(b"painel-session:" + private_key.encode('utf-8')).digest()
+
+def resume_session(token):
+    """Valida localmente um token de sessão e retorna o usuário, ou None.
+
+    Não consulta o BigQuery nem executa bcrypt: a assinatura e a validade de
+    15 dias são verificadas no próprio token. O usuário é conferido no cache
+    local de usuários: conta removida ou reset de senha posterior à emissão
+    revogam o token.
+    """
+    claims = session_tokens.verify_token(token, get_session_secret())
+    if claims is None:
+        return None
+    username, token_reset_date = claims
+    record = get_user_data(username)
+    if record is None:
+        return None
+    _, last_reset_date, first_login = record
+    if first_login is True or int(last_reset_date.timestamp()) > int(token_reset_date.timestamp()):
+        return None
+    return username
+
+def restore_session():
+    """Autentica a sessão atual a partir do cookie, se houver um token válido."""
+    if st.session_state.get('logged_out', False):
+        return False
+    token = session_tokens.read_cookie()
+    username = resume_session(token) if token else None
+    if username is None:
+        return False
+    st.session_state['authenticated'] = True
+    st.session_state['username'] = username
+    st.session_state['force_reset'] = False
+    return True
+
+def start_session(username, last_reset_date=None):
+    """Emite o token de sessão do usuário; ele é gravado no navegador por sync_session_cookie."""
+    if last_reset_date is None:
+        record = get_user_data(username)
+        last_reset_date = record[1]
+    st.session_state['session_token'] = session_tokens.issue_token(
+        username, last_reset_date, get_session_secret(),
+        ttl=timedelta(hours=get_auth_setting("session_ttl_hours")),
+    )
+    st.session_state.pop('logged_out', None)
+
+def sync_session_cookie():
+    """Grava o token pendente no navegador, ou o remove após um logout."""
+    token = st.session_state.pop('session_token', None)
+    if token:
+        session_tokens.store_cookie(token, get_auth_setting("session_ttl_hours") * 3600)
+    elif st.session_state.get('logged_out', False):
+        session_tokens.clear_cookie()
@@ -0,0 +1,97 @@
+# bench_api.py
+"""Benchmark de throughput da API local de predições (api.py).
+
+Usa uma única sessão aiohttp, reaproveitando as conexões keep-alive, e dispara
+as requisições com concorrência limitada contra cada endpoint.
+
+Uso: python bench_api.py --url http://127.0.0.1:8601 --requests 500 --concurrency 16
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import aiohttp
+
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+
+
+async def run_case(session, name, make_request, total, concurrency):
+    """Executa `total` requisições com no máximo `concurrency` em paralelo e imprime as métricas."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                async with make_request() as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{name:<22} {total / elapsed:>9.1f} req/s   "
+        f"p50 {statistics.median(latencies) * 1000:>7.1f} ms   "
+        f"p95 {p95 * 1000:>7.1f} ms   erros {errors}"
+    )
+
+async def main(url, total, concurrency, batch_size, token):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    connector = aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=60)
+    async with aiohttp.ClientSession(url, connector=connector, headers=headers) as session:
+        async with session.get("/produtos") as response:
+            response.raise_for_status()
+            products = (await response.json())[:50]
+        if not products:
+            print("Nenhum produto disponível na API.")
+            return
+
+        def scenario():
+            return {"produto": random.choice(products), "variacao_percentual": random.uniform(-30, 30)}
+
+        batch = {"cenarios": [scenario() for _ in range(batch_size)]}
+
+        print(f"{total} requisições por caso, concorrência {concurrency}, lote de {batch_size} cenários\n")
+        await run_case(session, "predict", lambda: session.post("/predict", json=scenario()), total, concurrency)
+        await run_case(
+            session, "predict/batch (json)",
+            lambda: session.post("/predict/batch", json=batch), total, concurrency,
+        )
+        await run_case(
+            session, "predict/batch (arrow)",
+            lambda: session.post("/predict/batch", json=batch, headers={"Accept": ARROW_MIME}),
+            total, concurrency,
+        )
+        await run_case(
+            session, "curve (json)",
+            lambda: session.get("/curve", params={"produto": random.choice(products)}), total, concurrency,
+        )
+        await run_case(
+            session, "curve (arrow)",
+            lambda: session.get(
+                "/curve", params={"produto": random.choice(products)}, headers={"Accept": ARROW_MIME}
+            ),
+            total, concurrency,
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da API local de predições.")
+    parser.add_argument("--url", default="http://127.0.0.1:8601")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--token", default=None)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.url, args.requests, args.concurrency, args.batch_size, args.token))
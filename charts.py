@@ -0,0 +1,95 @@
+# charts.py
+import plotly.graph_objects as go
+
+# A partir deste número de pontos a curva é desenhada com WebGL (Scattergl); com a grade
+# padrão do painel (SENSITIVITY_POINTS = 20) ela continua em SVG
+WEBGL_MIN_POINTS = 1000
+# Casas decimais mantidas nas séries serializadas (reduz o payload enviado ao navegador)
+SERIES_DECIMALS = 4
+HOVER_TEMPLATE = 'Preço=R$ %{x:.2f}<br>Percentual de Vendas=%{y:.2f}%<extra></extra>'
+
+
+def _series(values):
+    return [round(float(v), SERIES_DECIMALS) for v in values]
+
+def build_sensitivity_figure(curve, product, current_price):
+    """Monta a figura base da curva (curva, faixa de intervalo, ponto atual e marcador do cenário).
+
+    A figura não depende do preço simulado, então pode ser reaproveitada entre
+    reruns. O marcador do cenário é o último trace, criado oculto e posicionado
+    por set_scenario_marker.
+    """
+    scatter = go.Scattergl if len(curve) >= WEBGL_MIN_POINTS else go.Scatter
+    fig = go.Figure()
+
+    fig.add_trace(scatter(
+        x=_series(curve['preco']),
+        y=_series(curve['Percentual de Vendas']),
+        mode='lines+markers' if len(curve) < WEBGL_MIN_POINTS else 'lines',
+        line=dict(color='#636efa'),
+        hovertemplate=HOVER_TEMPLATE,
+        showlegend=False
+    ))
+
+    # Faixa do intervalo de predição, quando disponível
+    if 'Percentual Max' in curve:
+        fig.add_trace(scatter(
+            x=_series(curve['preco']),
+            y=_series(curve['Percentual Max']),
+            mode='lines',
+            line=dict(width=0),
+            hoverinfo='skip',
+            showlegend=False
+        ))
+        fig.add_trace(scatter(
+            x=_series(curve['preco']),
+            y=_series(curve['Percentual Min']),
+            mode='lines',
+            line=dict(width=0),
+            fill='tonexty',
+            fillcolor='rgba(59, 130, 246, 0.2)',
+            hoverinfo='skip',
+            name='Intervalo de Predição'
+        ))
+
+    # Destacar ponto atual (preço atual), com 0% de variação
+    fig.add_trace(go.Scatter(
+        x=[float(current_price)],
+        y=[0],
+        mode='markers',
+        marker=dict(size=15, color='red', symbol='star'),
+        hovertemplate=HOVER_TEMPLATE,
+        name='Situação Atual'
+    ))
+
+    # Marcador do cenário simulado (oculto até haver mudança de preço)
+    fig.add_trace(go.Scatter(
+        x=[float(current_price)],
+        y=[0],
+        mode='markers',
+        marker=dict(size=15, color='green', symbol='star'),
+        hovertemplate=HOVER_TEMPLATE,
+        name='Cenário Simulado',
+        visible=False
+    ))
+
+    fig.update_layout(
+        title=f"Crescimento X Preço - {product}",
+        xaxis_title="Preço (R$)",
+        yaxis_title="Crescimento Percentual",
+        showlegend=True,
+        height=500
+    )
+    return fig
+
+def set_scenario_marker(fig, new_price=None, new_sales_change=None):
+    """Posiciona o marcador do cenário simulado na figura (ou o oculta, se new_price for None).
+
+    Altera a figura no lugar e valida apenas o trace do marcador; a figura
+    deve pertencer à sessão, nunca ao cache compartilhado.
+    """
+    if new_price is None:
+        fig.data[-1].visible = False
+    else:
+        fig.data[-1].update(x=[float(new_price)], y=[float(new_sales_change)], visible=True)
+    return fig
@@ -0,0 +1,40 @@
+# data_snapshot.py
+import pyarrow as pa
+from product_search import ProductIndex
+
+
+class DataSnapshot:
+    """Snapshot imutável da tabela base, mantido uma única vez por processo.
+
+    Os dados ficam em uma tabela Arrow (colunar e somente leitura) e as sessões
+    recebem o próprio objeto por referência, sem serialização nem cópia a cada
+    rerun. Apenas as linhas do produto simulado são materializadas em um
+    DataFrame próprio (cópia sob demanda), que a simulação pode alterar à vontade.
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+        # Índice NM_ITEM -> posições das linhas, na ordem da consulta (mais recente primeiro)
+        self._rows = {}
+        for position, name in enumerate(table.column("NM_ITEM").to_pylist()):
+            self._rows.setdefault(name, []).append(position)
+        self.products = list(self._rows)
+
+        # Índice de busca construído junto com o snapshot (na thread de carga, não no rerun)
+        self.product_index = ProductIndex(self.products)
+
+    def __len__(self):
+        return self.table.num_rows
+
+    @property
+    def empty(self):
+        return self.table.num_rows == 0
+
+    def __contains__(self, product):
+        return product in self._rows
+
+    def product_frame(self, product):
+        """Retorna um DataFrame próprio (cópia) com as linhas do produto; vazio se não existir."""
+        rows = self._rows.get(product, [])
+        return self.table.take(pa.array(rows, type=pa.int64())).to_pandas()
@@ -0,0 +1,377 @@
+# elasticidade.py
+import logging
+import threading
+import pandas as pd
+import numpy as np
+import joblib
+from io import BytesIO
+from datetime import datetime
+from resilient_loader import ResilientLoader
+from data_snapshot import DataSnapshot
+import gcp_clients
+from google.api_core.exceptions import NotFound
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURAÇÕES DO PROJETO ---
+GCP_PROJECT_ID = "vaulted-zodiac-294702"
+MODEL_BUCKET = "rbbr-artifacts"
+MODEL_BLOB = "models/elasticity/modelo_final_elasticidade.joblib"
+# Artefato opcional dos intervalos de predição: um dict {quantil: modelo} salvo com joblib,
+# por exemplo {0.1: XGBRegressor(objective="reg:quantileerror", quantile_alpha=0.1), 0.9: ...},
+# treinados com as mesmas colunas e o mesmo alvo (log1p das vendas) do modelo principal.
+# Os quantis mínimo e máximo formam a faixa; sem o artefato, as previsões saem sem intervalo.
+INTERVAL_BLOB = "models/elasticity/modelo_quantis_elasticidade.joblib"
+BQ_DATASET = "RBBR_DATA_SCIENCE"
+BQ_BASE_TABLE = "DM_ELASTICITY"
+
+# Agrupamento das features para a explicação das predições
+FEATURE_GROUPS = {
+    'Preço': lambda c: c.startswith('PRECO') or c == 'VARIACAO_PERCENTUAL',
+    'Sazonalidade': lambda c: c.startswith('eh_'),
+    'Data': lambda c: c in ('ANO', 'MES'),
+    'Produto': lambda c: c.startswith('ITEM_'),
+}
+
+# Intervalos de revalidação (segundos) dos snapshots servidos pelo painel e pela API;
+# a cada revalidação só os metadados são lidos, e a carga completa ocorre apenas se a fonte mudou
+MODEL_TTL = 6 * 3600
+DATA_TTL = 3600
+
+_lock = threading.Lock()
+_loaders = {}
+
+# --- CARGA DO MODELO E DOS DADOS ---
+
+def load_model(project_id, bucket_name, blob_name):
+    """Carrega o modelo do GCS usando o cliente compartilhado.
+
+    Levanta exceção em caso de falha, para que o erro nunca seja memorizado.
+    """
+    storage_client = gcp_clients.get_storage_client(project_id)
+    bucket = storage_client.bucket(bucket_name)
+    blob = bucket.blob(blob_name)
+    model_file = BytesIO(blob.download_as_bytes())
+    model, model_columns = joblib.load(model_file)
+    return model, model_columns
+
+def load_interval_models(project_id, bucket_name, blob_name):
+    """Carrega os modelos de quantis do GCS (formato em INTERVAL_BLOB); retorna {} se o artefato não existir."""
+    storage_client = gcp_clients.get_storage_client(project_id)
+    blob = storage_client.bucket(bucket_name).blob(blob_name)
+    try:
+        model_file = BytesIO(blob.download_as_bytes())
+    except NotFound:
+        logger.warning(
+            "Modelos de quantis não encontrados em gs://%s/%s; as previsões serão servidas sem intervalo.",
+            bucket_name, blob_name,
+        )
+        return {}
+    return dict(joblib.load(model_file))
+
+def blob_generation(project_id, bucket_name, blob_name):
+    """Geração atual do blob no GCS (só metadados); "ausente" se o blob não existir."""
+    blob = gcp_clients.get_storage_client(project_id).bucket(bucket_name).get_blob(blob_name)
+    return blob.generation if blob is not None else "ausente"
+
+def table_modified(project_id, dataset, table):
+    """Momento da última modificação da tabela no BigQuery (só metadados)."""
+    return gcp_clients.get_bq_client(project_id).get_table(f"{project_id}.{dataset}.{table}").modified
+
+def load_data(project_id, dataset, table):
+    """Carrega os dados base do BigQuery como um DataSnapshot (Arrow, somente leitura).
+
+    Levanta exceção em caso de falha ou de resultado vazio.
+    """
+    query = f"""
+        SELECT
+            NM_ITEM,
+            PRECO_ATUAL,
+            PRECO_SIMULADO,
+            VARIACAO_PERCENTUAL,
+            VENDAS_PREVISTAS,
+            UPDATED_DT
+        FROM `{project_id}.{dataset}.{table}`
+        ORDER BY UPDATED_DT DESC
+    """
+    table = gcp_clients.get_bq_client(project_id).query(query).to_arrow()
+    if table.num_rows == 0:
+        raise ValueError("A consulta ao BigQuery não retornou dados. Verifique a tabela e a query.")
+    return DataSnapshot(table)
+
+def _get_loader(key, name, fetch, ttl, fingerprint=None):
+    loader = _loaders.get(key)
+    if loader is None:
+        with _lock:
+            loader = _loaders.get(key)
+            if loader is None:
+                loader = _loaders[key] = ResilientLoader(name, fetch, ttl=ttl, fingerprint=fingerprint)
+    return loader
+
+def get_model_loader(project_id=GCP_PROJECT_ID, bucket_name=MODEL_BUCKET, blob_name=MODEL_BLOB):
+    """Loader compartilhado pelo processo que serve o último modelo válido."""
+    return _get_loader(
+        ("modelo", project_id, bucket_name, blob_name), "modelo",
+        lambda: load_model(project_id, bucket_name, blob_name), MODEL_TTL,
+        fingerprint=lambda: blob_generation(project_id, bucket_name, blob_name),
+    )
+
+def get_interval_loader(project_id=GCP_PROJECT_ID, bucket_name=MODEL_BUCKET, blob_name=INTERVAL_BLOB):
+    """Loader compartilhado pelo processo dos modelos de quantis (opcionais)."""
+    return _get_loader(
+        ("quantis", project_id, bucket_name, blob_name), "quantis",
+        lambda: load_interval_models(project_id, bucket_name, blob_name), MODEL_TTL,
+        fingerprint=lambda: blob_generation(project_id, bucket_name, blob_name),
+    )
+
+def get_data_loader(project_id=GCP_PROJECT_ID, dataset=BQ_DATASET, table=BQ_BASE_TABLE):
+    """Loader compartilhado pelo processo que serve o último snapshot válido dos dados."""
+    return _get_loader(
+        ("dados", project_id, dataset, table), "dados",
+        lambda: load_data(project_id, dataset, table), DATA_TTL,
+        fingerprint=lambda: table_modified(project_id, dataset, table),
+    )
+
+# --- PREDIÇÃO ---
+
+def engenharia_features(df, data_predicao):
+    """Cria as features de data e feriados para a predição."""
+    df['DT_EMISSAO'] = pd.to_datetime(data_predicao)
+    df['ANO'] = df['DT_EMISSAO'].dt.year
+    df['MES'] = df['DT_EMISSAO'].dt.month
+
+    mes, dia = data_predicao.month, data_predicao.day
+    df['eh_dia_mulher'] = 1 if mes == 3 and dia <= 15 else 0
+    df['eh_dia_maes'] = 1 if (mes == 4 and dia > 15) or (mes == 5 and dia <= 15) else 0
+    df['eh_dia_namorados'] = 1 if (mes == 5 and dia > 15) or (mes == 6 and dia <= 15) else 0
+    df['eh_black_friday'] = 1 if mes == 11 and dia > 15 else 0
+    df['eh_natal'] = 1 if mes == 12 and dia <= 15 else 0
+    return df
+
+def build_feature_matrix(product_data, prices, model_columns, data_predicao=None):
+    """Monta a matriz de features do produto com uma linha por preço simulado."""
+    if data_predicao is None:
+        data_predicao = datetime.now()
+    prices = np.asarray(prices, dtype=float)
+
+    # Replica a linha mais recente do produto para cada preço
+    df_sim = product_data.iloc[np.zeros(len(prices), dtype=int)].reset_index(drop=True)
+    df_sim['PRECO_SIMULADO'] = prices
+    df_sim['PRECO_MEDIO'] = prices
+
+    # Engenharia de features
+    df_sim = engenharia_features(df_sim, data_predicao)
+
+    # One-hot encoding
+    df_encoded = pd.get_dummies(df_sim, columns=['NM_ITEM'], prefix='ITEM')
+    return df_encoded.reindex(columns=model_columns, fill_value=0)
+
+def _to_sales(pred_log):
+    pred_real = np.expm1(pred_log).round().astype(int)
+    pred_real[pred_real < 0] = 0
+    return pred_real
+
+def predict_sales(model, features):
+    """Prediz as vendas (escala real) para cada linha da matriz de features."""
+    return _to_sales(model.predict(features))
+
+def predict_sales_interval(features, interval_models=None):
+    """Retorna (mínimo, máximo) das vendas previstas por linha, ou None sem os modelos de quantis.
+
+    Usa os modelos de quantis carregados junto com o modelo principal (uma
+    chamada por quantil sobre a mesma matriz).
+    """
+    if not interval_models:
+        return None
+    low_q, high_q = min(interval_models), max(interval_models)
+    low = interval_models[low_q].predict(features)
+    high = interval_models[high_q].predict(features)
+    return _to_sales(np.minimum(low, high)), _to_sales(np.maximum(low, high))
+
+def sensitivity_price_grid(current_price, num_points=20):
+    """Grade de preços da curva de sensibilidade (-50% a +50% do preço atual)."""
+    return np.linspace(current_price * 0.5, current_price * 1.5, num_points)
+
+def generate_price_sensitivity_curve(snapshot, selected_product, model, model_columns, num_points=20, data_predicao=None, interval_models=None):
+    """Gera dados para a curva de sensibilidade de preço (uma única chamada ao modelo)."""
+    # Linhas do produto selecionado (cópia própria, o snapshot compartilhado não é alterado)
+    product_data = snapshot.product_frame(selected_product)
+    if product_data.empty:
+        return None
+
+    # Obter preço atual e vendas atuais
+    current_price = product_data['PRECO_ATUAL'].iloc[0]
+    current_sales = product_data['VENDAS_PREVISTAS'].iloc[0]
+
+    # Gerar range de preços (-50% a +50%)
+    price_range = sensitivity_price_grid(current_price, num_points)
+
+    features = build_feature_matrix(product_data, price_range, model_columns, data_predicao)
+    sales = predict_sales(model, features)
+    bounds = predict_sales_interval(features, interval_models)
+
+    # Calcular percentual de variação das vendas
+    def change_percent(values):
+        if current_sales > 0:
+            return (values - current_sales) / current_sales * 100
+        return np.zeros(len(values))
+
+    curve = pd.DataFrame({
+        'preco': price_range,
+        'vendas': sales,
+        'Percentual de Vendas': change_percent(sales)
+    })
+    if bounds is not None:
+        curve['vendas_min'], curve['vendas_max'] = bounds
+        curve['Percentual Min'] = change_percent(bounds[0])
+        curve['Percentual Max'] = change_percent(bounds[1])
+    return curve
+
+def predict_scenarios(snapshot, selected_product, price_change_percents, model, model_columns, data_predicao=None, interval_models=None, with_contributions=False):
+    """Prediz vendas e receita do produto para várias mudanças de preço em uma única chamada ao modelo.
+
+    Com `with_contributions`, a chamada ao modelo é a das contribuições nativas:
+    a soma de cada linha é a própria predição (escala log1p), e cada cenário
+    traz também 'contribuicoes' ({grupo: contribuição}). Modelos sem
+    contribuições nativas seguem pela predição comum, sem essa chave.
+    """
+    # Linhas do produto selecionado (cópia própria, o snapshot compartilhado não é alterado)
+    product_data = snapshot.product_frame(selected_product)
+    if product_data.empty:
+        return None
+
+    # Obter dados atuais
+    current_price = product_data['PRECO_ATUAL'].iloc[0]
+    current_sales = product_data['VENDAS_PREVISTAS'].iloc[0]
+    current_revenue = current_price * current_sales
+
+    # Calcular novos preços
+    new_prices = [current_price * (1 + p / 100) for p in price_change_percents]
+
+    features = build_feature_matrix(product_data, new_prices, model_columns, data_predicao)
+    contribs = predict_contributions(model, features) if with_contributions else None
+    if contribs is not None:
+        predicted = _to_sales(contribs.to_numpy(dtype=float).sum(axis=1))
+        grouped = group_contributions(contribs)
+    else:
+        predicted = predict_sales(model, features)
+    bounds = predict_sales_interval(features, interval_models)
+
+    scenarios = []
+    for position, (new_price, predicted_sales) in enumerate(zip(new_prices, predicted)):
+        predicted_revenue = new_price * predicted_sales
+
+        sales_change = predicted_sales - current_sales
+        sales_change_percent = (sales_change / current_sales * 100) if current_sales > 0 else 0
+
+        revenue_change = predicted_revenue - current_revenue
+        revenue_change_percent = (revenue_change / current_revenue * 100) if current_revenue > 0 else 0
+
+        scenarios.append({
+            'preco_atual': current_price,
+            'preco_novo': new_price,
+            'vendas_atuais': current_sales,
+            'vendas_preditas': predicted_sales,
+            'mudanca_vendas': sales_change,
+            'mudanca_vendas_percent': sales_change_percent,
+            'receita_atual': current_revenue,
+            'receita_predita': predicted_revenue,
+            'mudanca_receita': revenue_change,
+            'mudanca_receita_percent': revenue_change_percent
+        })
+        if bounds is not None:
+            sales_min, sales_max = bounds[0][position], bounds[1][position]
+            scenarios[-1].update({
+                'vendas_preditas_min': sales_min,
+                'vendas_preditas_max': sales_max,
+                'mudanca_vendas_percent_min': ((sales_min - current_sales) / current_sales * 100) if current_sales > 0 else 0,
+                'mudanca_vendas_percent_max': ((sales_max - current_sales) / current_sales * 100) if current_sales > 0 else 0,
+                'receita_predita_min': new_price * sales_min,
+                'receita_predita_max': new_price * sales_max,
+            })
+        if contribs is not None:
+            scenarios[-1]['contribuicoes'] = grouped.iloc[position].to_dict()
+    return scenarios
+
+def predict_sales_with_price_change(snapshot, selected_product, price_change_percent, model, model_columns, data_predicao=None, interval_models=None, with_contributions=False):
+    """Prediz vendas com mudança de preço."""
+    scenarios = predict_scenarios(
+        snapshot, selected_product, [price_change_percent], model, model_columns, data_predicao, interval_models,
+        with_contributions
+    )
+    return scenarios[0] if scenarios else None
+
+# --- EXPLICAÇÃO DAS PREDIÇÕES ---
+
+def predict_contributions(model, features):
+    """Contribuição de cada feature (escala log1p) por linha, via saída nativa do ensemble.
+
+    Retorna um DataFrame com uma coluna por feature mais 'BASE' (valor esperado
+    do modelo), ou None se o modelo não oferecer contribuições nativas.
+    """
+    try:
+        import xgboost as xgb
+    except ImportError:
+        return None
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    if not isinstance(booster, xgb.Booster):
+        return None
+    contribs = booster.predict(xgb.DMatrix(features), pred_contribs=True)
+    return pd.DataFrame(contribs, columns=list(features.columns) + ['BASE'])
+
+def group_contributions(contribs):
+    """Soma as contribuições por grupo de features (Preço, Sazonalidade, Data, Produto, Outros)."""
+    grouped = {}
+    remaining = [c for c in contribs.columns if c != 'BASE']
+    for group, belongs in FEATURE_GROUPS.items():
+        columns = [c for c in remaining if belongs(c)]
+        grouped[group] = contribs[columns].sum(axis=1)
+        remaining = [c for c in remaining if c not in columns]
+    grouped['Outros'] = contribs[remaining].sum(axis=1)
+    return pd.DataFrame(grouped)
+
+def explain_prices(snapshot, selected_product, prices, model, model_columns, data_predicao=None):
+    """Contribuições agrupadas para cada preço, em uma única chamada ao modelo.
+
+    Retorna None se o produto não existir ou o modelo não oferecer
+    contribuições nativas.
+    """
+    product_data = snapshot.product_frame(selected_product)
+    if product_data.empty:
+        return None
+    features = build_feature_matrix(product_data, prices, model_columns, data_predicao)
+    contribs = predict_contributions(model, features)
+    if contribs is None:
+        return None
+    grouped = group_contributions(contribs)
+    grouped.insert(0, 'preco', np.asarray(prices, dtype=float))
+    return grouped
+
+def explain_sensitivity_curve(snapshot, selected_product, model, model_columns, num_points=20, data_predicao=None):
+    """Contribuições agrupadas na grade de preços da curva e no preço atual (uma chamada ao modelo).
+
+    Não depende do preço simulado, então pode ficar em cache por produto; o
+    preço simulado é explicado pela mesma chamada que o prediz
+    (predict_scenarios com `with_contributions`).
+    """
+    product_data = snapshot.product_frame(selected_product)
+    if product_data.empty:
+        return None
+    current_price = float(product_data['PRECO_ATUAL'].iloc[0])
+    prices = list(sensitivity_price_grid(current_price, num_points)) + [current_price]
+    return explain_prices(snapshot, selected_product, prices, model, model_columns, data_predicao)
+
+def summarize_price_change(grouped, current_price, new_price):
+    """Resume por grupo o efeito (%) no cenário simulado e na variação em relação ao preço atual.
+
+    As contribuições estão em escala log1p, então o efeito de um grupo é
+    multiplicativo: exp(contribuição) - 1.
+    """
+    current = grouped.loc[np.isclose(grouped['preco'], current_price)].iloc[0]
+    scenario = grouped.loc[np.isclose(grouped['preco'], new_price)].iloc[0]
+    groups = [c for c in grouped.columns if c != 'preco']
+    return pd.DataFrame({
+        'Grupo': groups,
+        'Efeito no cenário (%)': [np.expm1(scenario[g]) * 100 for g in groups],
+        'Efeito na variação (%)': [np.expm1(scenario[g] - current[g]) * 100 for g in groups],
+    })
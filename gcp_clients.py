@@ -0,0 +1,111 @@
+# gcp_clients.py
+import threading
+import requests
+from google.auth.transport.requests import AuthorizedSession
+from google.cloud import bigquery
+from google.cloud import storage
+from google.oauth2 import service_account
+
+# --- CONSTANTES ---
+GCP_PROJECT_ID = "vaulted-zodiac-294702"
+SECRETS_PATH = ".streamlit/secrets.toml"
+SCOPES = ["https://www.googleapis.com/auth/cloud-platform"]
+
+# Tamanho do pool HTTP (conexões keep-alive) de cada cliente
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 32
+
+_lock = threading.Lock()
+_credentials = None
+_clients = {}
+_warm_up_started = False
+
+# --- CREDENCIAIS ---
+
+def load_service_account_info():
+    """Lê a conta de serviço dos segredos do Streamlit, com fallback para o secrets.toml."""
+    try:
+        import streamlit as st
+        return dict(st.secrets["gcp_service_account"])
+    except Exception:
+        import toml
+        return dict(toml.load(SECRETS_PATH)["gcp_service_account"])
+
+def get_credentials():
+    """Retorna as credenciais da conta de serviço, construídas uma única vez por processo."""
+    global _credentials
+    if _credentials is None:
+        with _lock:
+            if _credentials is None:
+                _credentials = service_account.Credentials.from_service_account_info(
+                    load_service_account_info(), scopes=SCOPES
+                )
+    return _credentials
+
+# --- CLIENTES COM POOL DE CONEXÕES ---
+
+def _build_session(credentials):
+    """Cria uma sessão HTTP autenticada com pool de conexões keep-alive."""
+    session = AuthorizedSession(credentials)
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=3
+    )
+    session.mount("https://", adapter)
+    return session
+
+def _get_client(kind, project_id):
+    key = (kind, project_id)
+    client = _clients.get(key)
+    if client is None:
+        credentials = get_credentials()
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client_cls = bigquery.Client if kind == "bigquery" else storage.Client
+                client = client_cls(
+                    project=project_id, credentials=credentials, _http=_build_session(credentials)
+                )
+                _clients[key] = client
+    return client
+
+def get_bq_client(project_id=GCP_PROJECT_ID):
+    """Retorna o cliente BigQuery compartilhado do processo."""
+    return _get_client("bigquery", project_id)
+
+def get_storage_client(project_id=GCP_PROJECT_ID):
+    """Retorna o cliente GCS compartilhado do processo."""
+    return _get_client("storage", project_id)
+
+# --- AQUECIMENTO ---
+
+def warm_up(dataset=None, bucket=None, project_id=GCP_PROJECT_ID):
+    """Obtém o token OAuth e abre as conexões TLS com BigQuery e GCS.
+
+    É um melhor esforço: qualquer falha é ignorada e a primeira chamada real
+    simplesmente paga o custo do handshake.
+    """
+    try:
+        bq_client = get_bq_client(project_id)
+        if dataset:
+            bq_client.get_dataset(f"{project_id}.{dataset}")
+        else:
+            list(bq_client.list_datasets(max_results=1))
+    except Exception:
+        pass
+    try:
+        storage_client = get_storage_client(project_id)
+        if bucket:
+            storage_client.bucket(bucket).exists()
+    except Exception:
+        pass
+
+def start_warm_up(dataset=None, bucket=None, project_id=GCP_PROJECT_ID):
+    """Dispara o aquecimento em segundo plano, uma única vez por processo."""
+    global _warm_up_started
+    with _lock:
+        if _warm_up_started:
+            return
+        _warm_up_started = True
+    threading.Thread(
+        target=warm_up, args=(dataset, bucket, project_id), name="gcp-warm-up", daemon=True
+    ).start()
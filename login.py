@@ -1,9 +1,14 @@
 # login.py
 import streamlit as st
-from auth import verify_login
+from auth import verify_login, restore_session, start_session, get_auth_setting
+from elasticidade import GCP_PROJECT_ID, MODEL_BUCKET, BQ_DATASET
+import gcp_clients
 
 st.set_page_config(layout="centered", page_title="Login")
 
+# Aquece credenciais e conexões com BigQuery/GCS enquanto o usuário digita
+gcp_clients.start_warm_up(dataset=BQ_DATASET, bucket=MODEL_BUCKET, project_id=GCP_PROJECT_ID)
+
 # --- GERENCIAMENTO DE ESTADO DA SESSÃO ---
 # Inicializa as variáveis da sessão se elas não existirem
 if 'authenticated' not in st.session_state:
@@ -13,6 +18,10 @@ if 'username' not in st.session_state:
 if 'force_reset' not in st.session_state:
     st.session_state['force_reset'] = False
 
+# Retoma a sessão a partir do token assinado no navegador (sem BigQuery nem bcrypt)
+if not st.session_state['authenticated']:
+    restore_session()
+
 # --- LÓGICA DE REDIRECIONAMENTO ---
 # Se o usuário já está logado e não precisa resetar, vai para o painel
 if st.session_state['authenticated'] and not st.session_state['force_reset']:
@@ -21,6 +30,25 @@ if st.session_state['authenticated'] and not st.session_state['force_reset']:
 elif st.session_state.get('force_reset', False):
     st.switch_page("pages/2_Reset_Password.py") # Criaremos esta página no próximo passo
 
+def get_client_id():
+    """Identifica o cliente (IP de origem) para o limite de tentativas por cliente.
+
+    Por padrão usa o IP da conexão. Atrás de proxies confiáveis
+    (`trusted_proxy_hops` na seção [auth]), usa a entrada do X-Forwarded-For
+    acrescentada pelo proxy mais externo; as entradas à esquerda dela vêm do
+    próprio cliente e não são confiáveis.
+    """
+    try:
+        hops = get_auth_setting("trusted_proxy_hops")
+        forwarded = st.context.headers.get("X-Forwarded-For")
+        if hops > 0 and forwarded:
+            addresses = [a.strip() for a in forwarded.split(",")]
+            if len(addresses) >= hops:
+                return addresses[-hops]
+        return st.context.ip_address
+    except Exception:
+        return None
+
 # --- PÁGINA DE LOGIN ---
 col1, col2, col3 = st.columns([1, 2, 1])
 with col2:
@@ -33,10 +61,11 @@ password_input = st.text_input("Senha", type="password")
 
 if st.button("Entrar"):
     if username_input and password_input:
-        # Chama a função de verificação que consulta o BigQuery
-        status = verify_login(username_input, password_input)
+        # Chama a função de verificação (servida pelo cache local de usuários)
+        status = verify_login(username_input, password_input, client_id=get_client_id())
 
         if status == "SUCCESS":
+            start_session(username_input)
             st.session_state['authenticated'] = True
             st.session_state['username'] = username_input
             st.session_state['force_reset'] = False
@@ -47,6 +76,12 @@ if st.button("Entrar"):
             st.session_state['force_reset'] = True
             st.switch_page("pages/2_Reset_Password.py")
 
+        elif status == "THROTTLED":
+            st.error("Muitas tentativas de login. Aguarde alguns minutos e tente novamente.")
+
+        elif status == "BUSY":
+            st.warning("O servidor está ocupado no momento. Tente novamente em alguns segundos.")
+
         else: # Status "INVALID"
             st.error("Usuário ou senha inválidos.")
             st.session_state['authenticated'] = False
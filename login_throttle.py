@@ -0,0 +1,63 @@
+# login_throttle.py
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class LoginThrottle:
+    """Limita tentativas de login por chave (usuário ou cliente) em uma janela deslizante.
+
+    A verificação é feita antes de qualquer trabalho de bcrypt, para que uma
+    rajada de tentativas custe apenas uma consulta a um dicionário.
+
+    As chaves ficam em ordem de último acesso (LRU) e nunca passam de
+    `max_keys`: ao atingir o limite, a chave usada há mais tempo é descartada.
+    Chaves expiradas são removidas periodicamente a partir do início da ordem,
+    sem varrer a tabela inteira.
+    """
+
+    def __init__(self, max_attempts, window, max_keys=10000):
+        self.max_attempts = max_attempts
+        self.window = window
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._attempts = OrderedDict()
+        self._next_prune = 0.0
+
+    def allow(self, key):
+        """Registra uma tentativa para `key` e indica se ela está dentro do limite."""
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_prune:
+                self._prune(now)
+                self._next_prune = now + min(self.window, 60)
+
+            attempts = self._attempts.get(key)
+            if attempts is None:
+                if len(self._attempts) >= self.max_keys:
+                    self._attempts.popitem(last=False)
+                attempts = self._attempts[key] = deque()
+            else:
+                self._attempts.move_to_end(key)
+            while attempts and now - attempts[0] > self.window:
+                attempts.popleft()
+            if len(attempts) >= self.max_attempts:
+                return False
+            attempts.append(now)
+            return True
+
+    def reset(self, key):
+        """Zera as tentativas de `key` (por exemplo, após um login bem-sucedido)."""
+        with self._lock:
+            self._attempts.pop(key, None)
+
+    def __len__(self):
+        return len(self._attempts)
+
+    def _prune(self, now):
+        # As chaves acessadas há mais tempo ficam no início; para na primeira ainda ativa
+        while self._attempts:
+            key, attempts = next(iter(self._attempts.items()))
+            if attempts and now - attempts[-1] <= self.window:
+                break
+            del self._attempts[key]
@@ -1,206 +1,127 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from google.cloud import storage
-from google.cloud import bigquery
-from io import BytesIO
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date
+import gcp_clients
+from elasticidade import (
+    GCP_PROJECT_ID, MODEL_BUCKET, BQ_DATASET,
+    get_model_loader, get_data_loader, get_interval_loader,
+    generate_price_sensitivity_curve, predict_sales_with_price_change,
+    explain_sensitivity_curve, summarize_price_change,
+)
+from auth import restore_session, sync_session_cookie
+from charts import build_sensitivity_figure, set_scenario_marker
+from popularity import PopularityTracker, Prefetcher
 
 # =============================================================================
 # SEÇÃO DE AUTENTICAÇÃO E SEGURANÇA
 # =============================================================================
-# Verifica se o usuário está autenticado. Se não, bloqueia o acesso.
-if not st.session_state.get('authenticated', False):
+# Verifica se o usuário está autenticado (ou tem um token de sessão válido). Se não, bloqueia o acesso.
+if not st.session_state.get('authenticated', False) and not restore_session():
+    sync_session_cookie()
     st.error("🔒 Acesso negado. Por favor, faça o login para continuar.")
     st.stop()
 
+# Grava no navegador o token emitido no login ou no reset de senha
+sync_session_cookie()
+
 # Botão de Logout será movido para o final da sidebar
 # =============================================================================
 
-# --- CONFIGURAÇÕES DO PAINEL E DO PROJETO ---
-GCP_PROJECT_ID = "vaulted-zodiac-294702"                
-MODEL_BUCKET = "rbbr-artifacts"                 
-MODEL_BLOB = "models/elasticity/modelo_final_elasticidade.joblib"    
-BQ_DATASET = "RBBR_DATA_SCIENCE"                 
-BQ_BASE_TABLE = "DM_ELASTICITY"         
+# Quantidade máxima de produtos enviados ao dropdown a cada busca
+PRODUCT_SEARCH_TOP_K = 50
+# Produtos mais populares pré-calculados após cada atualização de modelo ou dados
+PREFETCH_TOP_K = 20
+# Pontos da curva de sensibilidade (e da explicação na grade); a partir de
+# charts.WEBGL_MIN_POINTS a curva passa a ser desenhada com WebGL
+SENSITIVITY_POINTS = 20
 
+def format_age(seconds):
+    """Formata a idade de um snapshot para exibição."""
+    minutes = int(seconds // 60)
+    if minutes < 1:
+        return "agora mesmo"
+    if minutes < 60:
+        return f"há {minutes} min"
+    return f"há {minutes // 60}h{minutes % 60:02d}"
 
-@st.cache_resource
-def load_model(project_id, bucket_name, blob_name):
-    """Carrega o modelo do GCS usando os segredos do Streamlit."""
-    try:
-        from google.oauth2 import service_account
-        import json
-        
-        # Converter o dicionário de credenciais para o formato correto
-        credentials_info = dict(st.secrets["gcp_service_account"])
-        credentials = service_account.Credentials.from_service_account_info(credentials_info)
-        
-        storage_client = storage.Client(project=project_id, credentials=credentials)
-        bucket = storage_client.bucket(bucket_name)
-        blob = bucket.blob(blob_name)
-        model_file = BytesIO(blob.download_as_bytes())
-        model, model_columns = joblib.load(model_file)
-        return model, model_columns
-    except Exception as e:
-        st.error(f"Erro ao carregar o modelo: {e}")
-        return None, None
+@st.cache_resource(show_spinner=False, max_entries=500)
+def cached_sensitivity_figure(selected_product, data_predicao, model_version, data_version, interval_version,
+                              _snapshot, _model, _model_columns, _interval_models):
+    """Figura base da curva, compartilhada por (produto, data, versões); None se não houver curva.
 
-@st.cache_data
-def load_data(project_id, dataset, table):
-    """Carrega os dados base do BigQuery."""
-    try:
-        from google.oauth2 import service_account
-        
-        # Converter o dicionário de credenciais para o formato correto
-        credentials_info = dict(st.secrets["gcp_service_account"])
-        credentials = service_account.Credentials.from_service_account_info(credentials_info)
-        
-        query = f"""
-            SELECT 
-                NM_ITEM,
-                PRECO_ATUAL,
-                PRECO_SIMULADO,
-                VARIACAO_PERCENTUAL,
-                VENDAS_PREVISTAS,
-                UPDATED_DT
-            FROM `{project_id}.{dataset}.{table}`
-            ORDER BY UPDATED_DT DESC
-        """
-        bq_client = bigquery.Client(project=project_id, credentials=credentials)
-        df = bq_client.query(query).to_dataframe()
-        if df.empty:
-            st.warning("A consulta ao BigQuery não retornou dados. Verifique a tabela e a query.")
-        return df
-    except Exception as e:
-        st.error(f"Erro ao carregar os dados: {e}")
-        return pd.DataFrame()
-
-def engenharia_features(df, data_predicao):
-    """Cria as features de data e feriados para a predição."""
-    df['DT_EMISSAO'] = pd.to_datetime(data_predicao)
-    df['ANO'] = df['DT_EMISSAO'].dt.year
-    df['MES'] = df['DT_EMISSAO'].dt.month
-    
-    mes, dia = data_predicao.month, data_predicao.day
-    df['eh_dia_mulher'] = 1 if mes == 3 and dia <= 15 else 0
-    df['eh_dia_maes'] = 1 if (mes == 4 and dia > 15) or (mes == 5 and dia <= 15) else 0
-    df['eh_dia_namorados'] = 1 if (mes == 5 and dia > 15) or (mes == 6 and dia <= 15) else 0
-    df['eh_black_friday'] = 1 if mes == 11 and dia > 15 else 0
-    df['eh_natal'] = 1 if mes == 12 and dia <= 15 else 0
-    return df
-
-def generate_price_sensitivity_curve(df, selected_product, model, model_columns, num_points=20):
-    """Gera dados para a curva de sensibilidade de preço."""
-    try:
-        # Filtrar dados do produto selecionado
-        product_data = df[df['NM_ITEM'] == selected_product].copy()
-        if product_data.empty:
-            return None
-        
-        # Obter preço atual e vendas atuais
-        current_price = product_data['PRECO_ATUAL'].iloc[0]
-        current_sales = product_data['VENDAS_PREVISTAS'].iloc[0]
-        
-        # Gerar range de preços (-50% a +50%)
-        price_range = np.linspace(current_price * 0.5, current_price * 1.5, num_points)
-        
-        sensitivity_data = []
-        
-        for price in price_range:
-            # Criar dados para predição
-            df_sim = product_data.copy()
-            df_sim['PRECO_SIMULADO'] = price
-            df_sim['PRECO_MEDIO'] = price
-            
-            # Engenharia de features
-            df_sim = engenharia_features(df_sim, datetime.now())
-            
-            # One-hot encoding
-            df_encoded = pd.get_dummies(df_sim, columns=['NM_ITEM'], prefix='ITEM')
-            df_modelo_pronto = df_encoded.reindex(columns=model_columns, fill_value=0)
-            
-            # Predição
-            pred_log = model.predict(df_modelo_pronto)
-            pred_real = np.expm1(pred_log).round().astype(int)
-            pred_real[pred_real < 0] = 0
-            
-            # Calcular percentual de variação das vendas
-            sales_change_percent = ((pred_real[0] - current_sales) / current_sales) * 100 if current_sales > 0 else 0
-            
-            sensitivity_data.append({
-                'preco': price,
-                'vendas': pred_real[0],
-                'Percentual de Vendas': sales_change_percent
-            })
-        
-        return pd.DataFrame(sensitivity_data)
-    except Exception as e:
-        st.error(f"Erro ao gerar curva de sensibilidade: {e}")
+    O objeto é compartilhado entre as sessões e nunca deve ser alterado: cada
+    sessão trabalha sobre a própria cópia (session_figure).
+    """
+    curve = generate_price_sensitivity_curve(
+        _snapshot, selected_product, _model, _model_columns, SENSITIVITY_POINTS,
+        data_predicao=data_predicao, interval_models=_interval_models
+    )
+    if curve is None:
         return None
+    current_price = _snapshot.product_frame(selected_product)['PRECO_ATUAL'].iloc[0]
+    return build_sensitivity_figure(curve, selected_product, current_price)
 
-def predict_sales_with_price_change(df, selected_product, price_change_percent, model, model_columns):
-    """Prediz vendas com mudança de preço."""
-    try:
-        # Filtrar dados do produto selecionado
-        product_data = df[df['NM_ITEM'] == selected_product].copy()
-        if product_data.empty:
-            return None
-        
-        # Obter dados atuais
-        current_price = product_data['PRECO_ATUAL'].iloc[0]
-        current_sales = product_data['VENDAS_PREVISTAS'].iloc[0]
-        current_revenue = current_price * current_sales
-        
-        # Calcular novo preço
-        new_price = current_price * (1 + price_change_percent / 100)
-        
-        # Criar dados para predição
-        df_sim = product_data.copy()
-        df_sim['PRECO_SIMULADO'] = new_price
-        df_sim['PRECO_MEDIO'] = new_price
-        
-        # Engenharia de features
-        df_sim = engenharia_features(df_sim, datetime.now())
-        
-        # One-hot encoding
-        df_encoded = pd.get_dummies(df_sim, columns=['NM_ITEM'], prefix='ITEM')
-        df_modelo_pronto = df_encoded.reindex(columns=model_columns, fill_value=0)
-        
-        # Predição
-        pred_log = model.predict(df_modelo_pronto)
-        pred_real = np.expm1(pred_log).round().astype(int)
-        pred_real[pred_real < 0] = 0
-        
-        # Calcular métricas
-        predicted_sales = pred_real[0]
-        predicted_revenue = new_price * predicted_sales
-        
-        sales_change = predicted_sales - current_sales
-        sales_change_percent = (sales_change / current_sales * 100) if current_sales > 0 else 0
-        
-        revenue_change = predicted_revenue - current_revenue
-        revenue_change_percent = (revenue_change / current_revenue * 100) if current_revenue > 0 else 0
-        
-        return {
-            'preco_atual': current_price,
-            'preco_novo': new_price,
-            'vendas_atuais': current_sales,
-            'vendas_preditas': predicted_sales,
-            'mudanca_vendas': sales_change,
-            'mudanca_vendas_percent': sales_change_percent,
-            'receita_atual': current_revenue,
-            'receita_predita': predicted_revenue,
-            'mudanca_receita': revenue_change,
-            'mudanca_receita_percent': revenue_change_percent
-        }
-    except Exception as e:
-        st.error(f"Erro na predição: {e}")
-        return None
+@st.cache_data(show_spinner=False, max_entries=2000)
+def cached_prediction(selected_product, new_price, data_predicao, model_version, data_version, interval_version,
+                      _snapshot, _model, _model_columns, _interval_models):
+    """Cenário simulado (com as contribuições por grupo) em cache por (produto, preço, data, versões)."""
+    current_price = _snapshot.product_frame(selected_product)['PRECO_ATUAL'].iloc[0]
+    price_change = ((new_price - current_price) / current_price) * 100
+    return predict_sales_with_price_change(
+        _snapshot, selected_product, price_change, _model, _model_columns,
+        data_predicao=data_predicao, interval_models=_interval_models, with_contributions=True
+    )
+
+def session_figure(figure_key, base_figure):
+    """Cópia da figura base pertencente à sessão, refeita só quando produto, data ou versões mudam.
+
+    Copiar uma figure valida todos os traces (tão caro quanto montá-la); com a
+    cópia reaproveitada, cada edição de preço valida apenas o marcador.
+    """
+    cached = st.session_state.get("fig_main_state")
+    if cached is None or cached[0] != figure_key:
+        cached = (figure_key, go.Figure(base_figure))
+        st.session_state["fig_main_state"] = cached
+    return cached[1]
+
+def warm_product(product, prices):
+    """Calcula (e deixa em cache) a curva e os cenários mais simulados de um produto."""
+    model_loader, data_loader, interval_loader = get_model_loader(), get_data_loader(), get_interval_loader()
+    # Versões lidas antes dos valores: numa troca concorrente, a entrada fica só sob a chave antiga
+    versions = (model_loader.version, data_loader.version, interval_loader.version)
+    model_value, snapshot = model_loader.get(), data_loader.get()
+    if model_value is None or snapshot is None or product not in snapshot:
+        return
+    model, model_columns = model_value
+    interval_models = interval_loader.get() or {}
+    today = date.today()
+
+    cached_sensitivity_figure(product, today, *versions, snapshot, model, model_columns, interval_models)
+    cached_curve_attribution(product, today, versions[0], versions[1], snapshot, model, model_columns)
+    current_price = float(snapshot.product_frame(product)['PRECO_ATUAL'].iloc[0])
+    for price in [current_price] + prices:
+        cached_prediction(product, price, today, *versions, snapshot, model, model_columns, interval_models)
+
+@st.cache_resource
+def get_prefetcher():
+    """Contadores de popularidade e pré-carregamento compartilhados pelo processo."""
+    prefetcher = Prefetcher(PopularityTracker(), warm_product, top_k=PREFETCH_TOP_K)
+    # Cada atualização de modelo, dados ou quantis dispara uma rodada de pré-carregamento
+    for loader in (get_model_loader(), get_data_loader(), get_interval_loader()):
+        loader.add_listener(lambda _: prefetcher.schedule())
+    return prefetcher
+
+@st.cache_data(show_spinner=False, max_entries=500)
+def cached_curve_attribution(selected_product, data_predicao, model_version, data_version,
+                             _snapshot, _model, _model_columns):
+    """Contribuições por grupo na grade da curva e no preço atual, em cache por (produto, data, versões)."""
+    return explain_sensitivity_curve(
+        _snapshot, selected_product, _model, _model_columns, SENSITIVITY_POINTS, data_predicao
+    )
 
 # --- APLICAÇÃO STREAMLIT ---
 
@@ -374,12 +295,25 @@ st.markdown("""
 # Título principal
 st.title("📊 Análise de Elasticidade de Preço")
 
+# Abre as conexões com GCP em segundo plano (no-op se o login já o fez)
+gcp_clients.start_warm_up(dataset=BQ_DATASET, bucket=MODEL_BUCKET, project_id=GCP_PROJECT_ID)
+
 # Carrega o modelo e os dados base
-model, model_columns = load_model(GCP_PROJECT_ID, MODEL_BUCKET, MODEL_BLOB)
-df = load_data(GCP_PROJECT_ID, BQ_DATASET, BQ_BASE_TABLE)
+# Os loaders nunca memorizam falhas: servem o último snapshot válido e revalidam em segundo plano
+model_loader = get_model_loader()
+data_loader = get_data_loader()
+# Modelos de quantis são opcionais: sem eles o painel mostra só a estimativa pontual
+interval_loader = get_interval_loader()
+# Versões lidas antes dos valores (como em warm_product): se uma atualização chegar
+# no meio, os resultados calculados aqui ficam só sob a chave antiga
+versions = (model_loader.version, data_loader.version, interval_loader.version)
+model, model_columns = model_loader.get() or (None, None)
+interval_models = interval_loader.get() or {}
+# Snapshot imutável compartilhado por referência entre as sessões (sem cópia por rerun)
+snapshot = data_loader.get()
 
 # A aplicação só continua se o modelo e os dados foram carregados com sucesso
-if model is not None and not df.empty:
+if model is not None and snapshot is not None and not snapshot.empty:
     
     # Logo centralizado
     try:
@@ -426,6 +360,20 @@ if model is not None and not df.empty:
     </div>
     """, unsafe_allow_html=True)
     
+    # Idade dos dados servidos
+    st.sidebar.markdown(f"""
+    <div class="period-card">
+        <div class="period-label">Dados</div>
+        <div class="period-value">{data_loader.loaded_at.strftime('%d/%m %H:%M')} ({format_age(data_loader.age_seconds())})</div>
+    </div>
+    """, unsafe_allow_html=True)
+    for loader in (data_loader, model_loader):
+        if loader.is_stale:
+            st.sidebar.warning(
+                f"Falha ao atualizar {loader.name}; exibindo a última versão válida. "
+                f"Nova tentativa em {int(loader.seconds_until_retry())}s."
+            )
+    
     # Linha separadora
     st.sidebar.markdown("""
     <div class="filters-separator"></div>
@@ -440,14 +388,33 @@ if model is not None and not df.empty:
     </div>
     """, unsafe_allow_html=True)
     
+    # Busca por prefixo: só os melhores resultados são enviados ao dropdown
+    product_query = st.sidebar.text_input(
+        "Buscar produto",
+        placeholder="Buscar produto...",
+        label_visibility="collapsed",
+        key="product_query"
+    )
+    product_options = snapshot.product_index.search(product_query, k=PRODUCT_SEARCH_TOP_K)
+    if not product_options:
+        st.sidebar.caption("Nenhum produto encontrado.")
+    # Enquanto o usuário digita, o produto já escolhido continua selecionado (e entre as
+    # opções) até que ele escolha outro; a busca só muda a lista do dropdown
+    previous_product = st.session_state.get("last_product")
+    if previous_product in snapshot and previous_product not in product_options:
+        product_options = [previous_product] + product_options[:PRODUCT_SEARCH_TOP_K - 1]
+    if not product_options:
+        product_options = snapshot.products[:1]
+
     # Container para centralizar o dropdown
     st.sidebar.markdown('<div class="input-container">', unsafe_allow_html=True)
     selected_product = st.sidebar.selectbox(
         "Escolha o produto:",
-        options=df['NM_ITEM'].unique(),
-        index=0,
+        options=product_options,
+        index=product_options.index(previous_product) if previous_product in product_options else 0,
         label_visibility="collapsed"
     )
+    st.session_state["last_product"] = selected_product
     st.sidebar.markdown('</div>', unsafe_allow_html=True)
     
     # Linha separadora
@@ -466,7 +433,7 @@ if model is not None and not df.empty:
     
     if selected_product:
         # Obter preço atual do produto selecionado
-        product_data = df[df['NM_ITEM'] == selected_product]
+        product_data = snapshot.product_frame(selected_product)
         if not product_data.empty:
             current_price = product_data['PRECO_ATUAL'].iloc[0]
             
@@ -543,61 +510,45 @@ if model is not None and not df.empty:
     # Botão de Logout no final da sidebar
     if st.sidebar.button("Logout"):
         # Limpa todo o estado da sessão para deslogar o usuário
-        for key in st.session_state.keys():
+        for key in list(st.session_state.keys()):
             del st.session_state[key]
+        # Impede a retomada automática e remove o token do navegador no próximo rerun
+        st.session_state['logged_out'] = True
         st.rerun() # Reinicia a aplicação para voltar à tela de login
     
     # Calcular previsão com mudança de preço
-    prediction = predict_sales_with_price_change(df, selected_product, price_change, model, model_columns)
+    # Registra a consulta para o pré-carregamento dos produtos populares; reruns sem
+    # mudança de produto ou preço (por exemplo, digitando na busca) não contam
+    if st.session_state.get("last_recorded") != (selected_product, new_price):
+        get_prefetcher().tracker.record(selected_product, new_price)
+        st.session_state["last_recorded"] = (selected_product, new_price)
+    try:
+        prediction = cached_prediction(
+            selected_product, new_price, date.today(), *versions,
+            snapshot, model, model_columns, interval_models
+        )
+    except Exception as e:
+        st.error(f"Erro na predição: {e}")
+        prediction = None
     
     if prediction:
-        # Gerar dados da curva de sensibilidade para o gráfico principal
-        sensitivity_curve_data = generate_price_sensitivity_curve(df, selected_product, model, model_columns, 20)
-        
-        if sensitivity_curve_data is not None:
-            # Gráfico principal: Preço (X) vs Percentual de Vendas (Y)
-            fig_main = px.line(
-                sensitivity_curve_data,
-                x='preco',
-                y='Percentual de Vendas',
-                title=f"Crescimento X Preço - {selected_product}",
-                markers=True
+        # Figura base da curva (em cache por produto, data e versões); só o marcador muda por edição de preço
+        try:
+            base_figure = cached_sensitivity_figure(
+                selected_product, date.today(), *versions,
+                snapshot, model, model_columns, interval_models
             )
-            
-            # Destacar ponto atual (preço atual)
-            current_price = prediction['preco_atual']
-            current_sales_change = 0  # 0% de variação na situação atual
-            
-            fig_main.add_trace(go.Scatter(
-                x=[current_price],
-                y=[current_sales_change],
-                mode='markers',
-                marker=dict(size=15, color='red', symbol='star'),
-                name='Situação Atual'
-            ))
-            
+        except Exception as e:
+            st.error(f"Erro ao gerar curva de sensibilidade: {e}")
+            base_figure = None
+        
+        if base_figure is not None:
+            fig_main = session_figure((selected_product, date.today(), versions), base_figure)
             # Destacar ponto com novo preço se houver mudança
             if price_change != 0:
-                new_price = prediction['preco_novo']
-                new_sales_change = prediction['mudanca_vendas_percent']
-                
-                fig_main.add_trace(go.Scatter(
-                    x=[new_price],
-                    y=[new_sales_change],
-                    mode='markers',
-                    marker=dict(size=15, color='green', symbol='star'),
-                    name='Cenário Simulado'
-                ))
-            
-            # Configurar formatação do tooltip
-            fig_main.update_traces(hovertemplate='Preço=R$ %{x:.2f}<br>Percentual de Vendas=%{y:.2f}%<extra></extra>')
-            
-            fig_main.update_layout(
-                xaxis_title="Preço (R$)",
-                yaxis_title="Crescimento Percentual",
-                showlegend=True,
-                height=500
-            )
+                set_scenario_marker(fig_main, prediction['preco_novo'], prediction['mudanca_vendas_percent'])
+            else:
+                set_scenario_marker(fig_main)
             
             st.plotly_chart(fig_main, use_container_width=True)
         
@@ -621,6 +572,11 @@ if model is not None and not df.empty:
                 value=f"R$ {prediction['receita_atual']:,.2f}",
                 delta=f"R$ {prediction['mudanca_receita']:,.2f}" if price_change != 0 else None
             )
+            if price_change != 0 and 'receita_predita_min' in prediction:
+                st.caption(
+                    f"Receita prevista entre R$ {prediction['receita_predita_min']:,.2f} "
+                    f"e R$ {prediction['receita_predita_max']:,.2f}"
+                )
         
         with col3:
             # Mostrar 0% se não há mudança de preço, senão mostrar o crescimento
@@ -637,8 +593,54 @@ if model is not None and not df.empty:
                 value=crescimento_value,
                 delta=delta
             )
+            if price_change != 0 and 'mudanca_vendas_percent_min' in prediction:
+                st.caption(
+                    f"Intervalo: {prediction['mudanca_vendas_percent_min']:.1f}% "
+                    f"a {prediction['mudanca_vendas_percent_max']:.1f}%"
+                )
         
         
+        # Explicação da previsão (contribuição de cada grupo de features)
+        # A grade da curva e o preço atual ficam em cache por produto; as contribuições do preço
+        # simulado vêm da mesma chamada ao modelo que calculou a previsão
+        scenario_price = float(prediction['preco_novo'])
+        try:
+            attribution = cached_curve_attribution(
+                selected_product, date.today(), versions[0], versions[1], snapshot, model, model_columns
+            )
+            if attribution is not None and 'contribuicoes' in prediction:
+                scenario_row = pd.DataFrame([{'preco': scenario_price, **prediction['contribuicoes']}])
+                attribution = pd.concat([attribution, scenario_row], ignore_index=True)
+            else:
+                attribution = None
+        except Exception as e:
+            st.warning(f"Não foi possível calcular a explicação da previsão: {e}")
+            attribution = None
+
+        if attribution is not None:
+            st.markdown("---")
+            st.header("🔎 O que explica a previsão")
+            breakdown = summarize_price_change(attribution, float(current_price), scenario_price)
+            effect_column = 'Efeito na variação (%)' if price_change != 0 else 'Efeito no cenário (%)'
+
+            fig_attr = px.bar(
+                breakdown,
+                x=effect_column,
+                y='Grupo',
+                orientation='h',
+                color=breakdown[effect_column] > 0,
+                color_discrete_map={True: '#22c55e', False: '#ef4444'},
+                title="Variação das vendas por grupo de features" if price_change != 0
+                else "Efeito de cada grupo de features nas vendas previstas"
+            )
+            fig_attr.update_traces(hovertemplate='%{y}: %{x:.1f}%<extra></extra>')
+            fig_attr.update_layout(showlegend=False, height=300, xaxis_title="Efeito (%)", yaxis_title="")
+            st.plotly_chart(fig_attr, use_container_width=True)
+            st.caption(
+                "Efeitos multiplicativos estimados pelas contribuições nativas do modelo; "
+                "'Efeito na variação' compara o cenário simulado com o preço atual."
+            )
+
         # Rodapé
         st.markdown("---")
         st.markdown(
@@ -651,4 +653,10 @@ if model is not None and not df.empty:
     )
 
 else:
-    st.error("🔴 Falha ao carregar modelo ou dados do BigQuery. Verifique as configurações e os logs.")
\ No newline at end of file
+    st.error("🔴 Falha ao carregar modelo ou dados do BigQuery. Verifique as configurações e os logs.")
+    for loader in (model_loader, data_loader):
+        if loader.last_error is not None:
+            st.caption(
+                f"Erro ao carregar {loader.name}: {loader.last_error} "
+                f"(nova tentativa em {int(loader.seconds_until_retry())}s)"
+            )
\ No newline at end of file
@@ -1,6 +1,6 @@
 # pages/2_Reset_Password.py
 import streamlit as st
-from auth import update_password
+from auth import update_password, start_session
 import re
 
 st.set_page_config(page_title="Redefinir Senha", layout="centered")
@@ -88,6 +88,7 @@ if st.button("Redefinir Senha"):
         # Se tudo estiver correto, atualiza a senha
         try:
             update_password(st.session_state['username'], new_password)
+            start_session(st.session_state['username'])
             # Limpa os campos de senha do estado da sessão para segurança
             if "new_password" in st.session_state: del st.session_state["new_password"]
             if "confirm_password" in st.session_state: del st.session_state["confirm_password"]
@@ -0,0 +1,50 @@
+# password_hasher.py
+import os
+import threading
+import bcrypt
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+
+class HasherBusy(Exception):
+    """A fila do pool de bcrypt está cheia ou a verificação demorou demais."""
+
+
+class PasswordHasher:
+    """Executa o bcrypt em um pool de threads limitado, fora da thread do script.
+
+    O bcrypt libera o GIL durante o cálculo, então `max_workers` define quantos
+    núcleos o login pode ocupar. Pedidos além de `max_workers + max_queue`
+    são recusados imediatamente com HasherBusy, em vez de se acumularem.
+    `rounds` é o fator de custo usado para novos hashes; a verificação usa o
+    custo gravado em cada hash.
+    """
+
+    def __init__(self, rounds=12, max_workers=None, max_queue=16, timeout=10):
+        if max_workers is None:
+            max_workers = max(1, (os.cpu_count() or 2) // 2)
+        self.rounds = rounds
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+
+    def hash(self, password):
+        """Gera o hash (bytes) de uma senha."""
+        return self._run(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt(self.rounds))
+
+    def check(self, password, hashed_password):
+        """Verifica se a senha corresponde ao hash (string)."""
+        return self._run(bcrypt.checkpw, password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy("Fila de verificação de senhas cheia.")
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise HasherBusy("Tempo esgotado na verificação da senha.")
@@ -0,0 +1,97 @@
+# password_writer.py
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordWriteQueue:
+    """Grava as alterações de senha em lote (group commit), com um único MERGE por lote.
+
+    `write()` só retorna depois que a alteração do usuário foi gravada, de modo
+    que a confirmação exibida na tela é sempre verdadeira. Resets simultâneos
+    são agrupados: enquanto um MERGE está em andamento, as alterações que
+    chegam ficam na fila e seguem juntas no MERGE seguinte. Resets repetidos
+    do mesmo usuário antes da gravação são coalescidos no mais recente.
+
+    `write_batch(updates)` recebe uma lista de tuplas (USERNAME, PASSWORD_HASH)
+    e retorna {USERNAME: LAST_RESET_DATE} com a data gravada pelo banco
+    (usuários ausentes do retorno não existem na tabela). Em caso de falha deve
+    levantar exceção, que é registrada no log e repetida até `max_attempts`
+    vezes com backoff exponencial; persistindo, a exceção é repassada a quem
+    chamou `write()`.
+    """
+
+    def __init__(self, write_batch, on_written=None, max_attempts=3, base_backoff=0.5):
+        self._write_batch = write_batch
+        self._on_written = on_written
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}  # username -> (PASSWORD_HASH, [futures])
+
+    def write(self, username, password_hash):
+        """Grava a nova senha do usuário e retorna o LAST_RESET_DATE gravado.
+
+        Levanta a exceção da gravação em caso de falha.
+        """
+        future = Future()
+        with self._lock:
+            previous = self._pending.get(username)
+            futures = (previous[1] if previous else []) + [future]
+            self._pending[username] = (password_hash, futures)
+        # Se outro MERGE já estiver em andamento, esta chamada espera e grava o próximo lote
+        self.flush()
+        return future.result()
+
+    def flush(self):
+        """Grava imediatamente tudo o que estiver pendente; retorna o número de usuários."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            updates = [(u, h) for u, (h, _) in batch.items()]
+            try:
+                reset_dates = self._write_with_retry(updates)
+            except Exception as e:
+                for _, futures in batch.values():
+                    for future in futures:
+                        future.set_exception(e)
+                return 0
+            for username, (password_hash, futures) in batch.items():
+                last_reset_date = reset_dates.get(username)
+                if last_reset_date is None:
+                    error = LookupError(f"Usuário não encontrado: {username}")
+                    for future in futures:
+                        future.set_exception(error)
+                    continue
+                if self._on_written is not None:
+                    try:
+                        self._on_written(username, password_hash, last_reset_date)
+                    except Exception:
+                        logger.exception("Falha no callback após gravar a senha de %s.", username)
+                for future in futures:
+                    future.set_result(last_reset_date)
+            return len(reset_dates)
+
+    def _write_with_retry(self, updates):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                reset_dates = self._write_batch(updates)
+            except Exception as e:
+                logger.warning(
+                    "Falha ao gravar %d senha(s) (tentativa %d de %d): %s",
+                    len(updates), attempt, self.max_attempts, e,
+                )
+                if attempt == self.max_attempts:
+                    logger.error("Gravação de senhas abandonada após %d tentativas.", attempt)
+                    raise
+                time.sleep(self.base_backoff * 2 ** (attempt - 1) * random.uniform(0.8, 1.2))
+            else:
+                return reset_dates
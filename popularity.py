@@ -0,0 +1,117 @@
+# popularity.py
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PopularityTracker:
+    """Contadores com decaimento exponencial dos produtos e preços consultados nas sessões.
+
+    Cada produto guarda um score que cai pela metade a cada `half_life`
+    segundos sem consultas, além dos `max_prices` preços mais simulados. Quando
+    passa de `max_products` produtos, os de menor score são descartados.
+    """
+
+    def __init__(self, half_life=6 * 3600, max_products=2000, max_prices=5):
+        self.half_life = half_life
+        self.max_products = max_products
+        self.max_prices = max_prices
+        self._lock = threading.Lock()
+        self._products = {}  # produto -> [score, instante, {preço: score}]
+
+    def _decay(self, score, since, now):
+        return score * math.pow(2.0, -(now - since) / self.half_life)
+
+    def record(self, product, price=None):
+        """Registra uma consulta ao produto (e, opcionalmente, ao preço simulado)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._products.get(product)
+            if entry is None:
+                entry = self._products[product] = [0.0, now, {}]
+            factor = self._decay(1.0, entry[1], now)
+            entry[0] = entry[0] * factor + 1.0
+            entry[1] = now
+
+            if price is not None:
+                prices = entry[2]
+                for key in prices:
+                    prices[key] *= factor
+                price = round(float(price), 2)
+                prices[price] = prices.get(price, 0.0) + 1.0
+                if len(prices) > self.max_prices:
+                    del prices[min(prices, key=prices.get)]
+
+            if len(self._products) > self.max_products:
+                self._compact(now)
+
+    def top(self, k):
+        """Retorna até `k` pares (produto, [preços mais simulados]) em ordem de popularidade."""
+        now = time.monotonic()
+        with self._lock:
+            ranked = sorted(
+                self._products.items(),
+                key=lambda item: self._decay(item[1][0], item[1][1], now),
+                reverse=True,
+            )[:k]
+            return [
+                (product, sorted(entry[2], key=entry[2].get, reverse=True))
+                for product, entry in ranked
+            ]
+
+    def _compact(self, now):
+        # Mantém apenas os 90% mais populares, para não compactar a cada registro
+        keep = int(self.max_products * 0.9)
+        ranked = sorted(
+            self._products, key=lambda p: self._decay(self._products[p][0], self._products[p][1], now),
+            reverse=True,
+        )
+        for product in ranked[keep:]:
+            del self._products[product]
+
+
+class Prefetcher:
+    """Aquece, em segundo plano, os cálculos dos produtos mais populares.
+
+    `schedule()` pode ser chamado a cada atualização de modelo ou dados; chamadas
+    próximas são agrupadas em uma única rodada após `delay` segundos.
+    `warm(product, prices)` deve calcular (e com isso colocar em cache) a curva e
+    os cenários do produto. Entre um produto e outro a thread dorme `pause`
+    segundos, liberando o GIL para as sessões.
+    """
+
+    def __init__(self, tracker, warm, top_k=20, delay=2.0, pause=0.05):
+        self.tracker = tracker
+        self._warm = warm
+        self.top_k = top_k
+        self.delay = delay
+        self.pause = pause
+        self._wake = threading.Event()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def schedule(self):
+        """Agenda uma rodada de pré-carregamento."""
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="prefetch", daemon=True)
+                self._worker.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            time.sleep(self.delay)
+            self._wake.clear()
+            for product, prices in self.tracker.top(self.top_k):
+                if self._wake.is_set():
+                    # Nova atualização durante a rodada: recomeça com os valores mais novos
+                    break
+                try:
+                    self._warm(product, prices)
+                except Exception:
+                    logger.exception("Falha ao pré-carregar o produto %s.", product)
+                time.sleep(self.pause)
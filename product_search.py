@@ -0,0 +1,158 @@
+# product_search.py
+import re
+import unicodedata
+from bisect import bisect_left
+from itertools import accumulate
+
+_TOKEN_SPLIT = re.compile(r"[^0-9a-z]+")
+_NONZERO_BYTE = re.compile(rb"[^\x00]")
+
+
+def normalize(text):
+    """Remove acentos e diferenças de caixa ("Escova Câmbio" -> "escova cambio")."""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+def tokenize(text):
+    return [t for t in _TOKEN_SPLIT.split(normalize(text)) if t]
+
+
+class ProductIndex:
+    """Índice de prefixos de tokens sobre NM_ITEM, construído uma vez por snapshot.
+
+    Cada token normalizado tem sua lista (ordenada) de produtos, e o vocabulário
+    fica ordenado, de modo que os tokens que começam por um termo formam uma
+    faixa contígua encontrada por busca binária. Prefixos de até
+    `short_prefix_len` caracteres, que casam com boa parte do catálogo, já têm
+    a lista completa de produtos pré-calculada, e todo prefixo que casa com
+    mais de `scan_limit` produtos tem também uma bitmask (bit i = produto i).
+
+    Se o termo de menor cardinalidade estimada casa com até `scan_limit`
+    produtos, ele conduz a busca e os demais termos são conferidos apenas nos
+    candidatos, com uma busca de substring sobre os tokens do produto. Acima
+    disso, todos os termos são frequentes e o resultado é o AND das bitmasks.
+    A busca para assim que `k` produtos casam.
+    """
+
+    def __init__(self, products, max_k=50, short_prefix_len=2, scan_limit=300):
+        self.products = list(products)
+        self.max_k = max_k
+        self.short_prefix_len = short_prefix_len
+        self.scan_limit = scan_limit
+        self._names = [normalize(p) for p in self.products]
+
+        product_tokens = [tokenize(p) for p in self.products]
+        # Tokens do produto em uma única string (" escova cabelo 250ml"): um token começa
+        # pelo termo se e somente se " termo" aparece na string
+        self._joined = [" " + " ".join(tokens) for tokens in product_tokens]
+
+        postings, short = {}, {}
+        for product_id, tokens in enumerate(product_tokens):
+            unique = set(tokens)
+            for token in unique:
+                postings.setdefault(token, []).append(product_id)
+            prefixes = {t[:size] for t in unique for size in range(1, min(short_prefix_len, len(t)) + 1)}
+            for prefix in prefixes:
+                short.setdefault(prefix, []).append(product_id)
+        self._vocab = sorted(postings)
+        self._postings = [postings[token] for token in self._vocab]
+        # Soma acumulada do tamanho das listas: estimativa O(log n) de quantos produtos casam com um prefixo
+        self._sizes = list(accumulate((len(ids) for ids in self._postings), initial=0))
+        self._short = short
+
+        # Bitmasks dos prefixos frequentes: buscas só com termos frequentes viram um AND
+        # de inteiros, feito em C
+        self._num_bytes = len(self.products) // 8 + 1
+        self._masks = {}
+        for prefix, ids in short.items():
+            if len(ids) > scan_limit:
+                self._masks[prefix] = self._build_mask([ids])
+        # Prefixos mais longos: a faixa de um prefixo contém a de cada extensão dele, então
+        # basta estender, um caractere por vez, os que continuam casando com mais de `scan_limit`
+        frontier = [p for p in short if len(p) == short_prefix_len]
+        while frontier:
+            next_frontier = []
+            for prefix in frontier:
+                start, end = self._range(prefix)
+                if self._sizes[end] - self._sizes[start] <= scan_limit:
+                    continue
+                for child in {t[:len(prefix) + 1] for t in self._vocab[start:end] if len(t) > len(prefix)}:
+                    if self._estimate(child) > scan_limit:
+                        child_start, child_end = self._range(child)
+                        self._masks[child] = self._build_mask(self._postings[child_start:child_end])
+                        next_frontier.append(child)
+            frontier = next_frontier
+
+    def _build_mask(self, lists):
+        bits = bytearray(self._num_bytes)
+        for ids in lists:
+            for product_id in ids:
+                bits[product_id >> 3] |= 1 << (product_id & 7)
+        return int.from_bytes(bits, "little")
+
+    def _range(self, term):
+        return bisect_left(self._vocab, term), bisect_left(self._vocab, term + "\uffff")
+
+    def _estimate(self, term):
+        if len(term) <= self.short_prefix_len:
+            return len(self._short.get(term, ()))
+        start, end = self._range(term)
+        return self._sizes[end] - self._sizes[start]
+
+    def _candidates(self, term):
+        # Só é chamada com até `scan_limit` produtos: une as listas da faixa em ordem de id
+        if len(term) <= self.short_prefix_len:
+            return self._short.get(term, ())
+        start, end = self._range(term)
+        return sorted(set().union(*self._postings[start:end]))
+
+    def _mask_matches(self, terms, k):
+        # Todos os termos casam com mais de `scan_limit` produtos e têm bitmask exata
+        mask = -1
+        for term in terms:
+            mask &= self._masks[term]
+        # Percorre só os bytes não nulos, localizados pelo regex (em C)
+        data = mask.to_bytes(self._num_bytes, "little")
+        matches = []
+        for found in _NONZERO_BYTE.finditer(data):
+            position = found.start()
+            byte = data[position]
+            for bit in range(8):
+                if byte >> bit & 1:
+                    matches.append(position * 8 + bit)
+                    if len(matches) >= k:
+                        return matches
+        return matches
+
+    def search(self, query, k=20):
+        """Retorna até `k` produtos cujos tokens começam pelos termos da busca."""
+        k = min(k, self.max_k)
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return self.products[:k]
+
+        estimates = {term: self._estimate(term) for term in terms}
+        driver = min(terms, key=estimates.get)
+        if estimates[driver] == 0:
+            return []
+
+        if len(terms) == 1 and len(driver) <= self.short_prefix_len:
+            matches = list(self._short[driver][:k])
+        elif estimates[driver] > self.scan_limit:
+            matches = self._mask_matches(terms, k)
+        else:
+            # Termos mais seletivos primeiro: o candidato é descartado no primeiro que falha
+            needles = [" " + term for term in sorted(terms, key=estimates.get)]
+            joined = self._joined
+            matches = []
+            for product_id in self._candidates(driver):
+                text = joined[product_id]
+                if all(needle in text for needle in needles):
+                    matches.append(product_id)
+                    if len(matches) >= k:
+                        break
+
+        # Nomes que começam pela busca inteira aparecem primeiro; depois, a ordem do snapshot
+        full = normalize(query).strip()
+        matches = sorted(matches, key=lambda i: (not self._names[i].startswith(full), i))
+        return [self.products[i] for i in matches]
@@ -0,0 +1,196 @@
+# resilient_loader.py
+import logging
+import random
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+class ResilientLoader:
+    """Mantém o último valor carregado com sucesso e o revalida em segundo plano.
+
+    Falhas nunca substituem o último valor válido: enquanto a fonte estiver
+    indisponível, o snapshot anterior continua sendo servido e novas tentativas
+    são feitas com backoff exponencial. Após `failure_threshold` falhas seguidas
+    o circuito abre e as tentativas ficam suspensas por `cooldown` segundos.
+
+    Se `fingerprint` for informado (uma função barata que identifica a versão
+    da fonte, como a geração do blob ou a data de modificação da tabela), cada
+    revalidação o consulta primeiro e só chama `fetch` quando ele muda; sem
+    mudança, o valor, a versão e os caches derivados dela são mantidos.
+
+    Com `refresh_on_access=True` não há thread permanente: a revalidação só é
+    disparada (em segundo plano) quando `get()` encontra o valor vencido, de
+    modo que um processo ocioso não faz nenhuma consulta.
+    """
+
+    def __init__(self, name, fetch, ttl=3600, base_backoff=5, max_backoff=300,
+                 failure_threshold=3, cooldown=600, fingerprint=None, refresh_on_access=False):
+        self.name = name
+        self._fetch = fetch
+        self._fingerprint = fingerprint
+        self.refresh_on_access = refresh_on_access
+        self.ttl = ttl
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._worker = None
+        self._listeners = []
+
+        self._value = None
+        self._source_version = None
+        self._version = 0
+        self._loaded_at = None
+        self._last_error = None
+        self._last_error_at = None
+        self._failures = 0
+        self._next_attempt = 0.0  # time.monotonic() da próxima tentativa
+
+    # --- API PÚBLICA ---
+
+    def get(self):
+        """Retorna o último valor válido, ou None se nenhuma carga teve sucesso ainda.
+
+        Apenas a primeira carga é síncrona; as revalidações seguintes acontecem
+        em segundo plano e nunca bloqueiam quem está lendo.
+        """
+        if self._loaded_at is None and self._is_due():
+            self._attempt()
+        elif self.refresh_on_access:
+            if self._is_due():
+                self._start_worker(self._attempt)
+        else:
+            self._ensure_worker()
+        return self._value
+
+    def add_listener(self, callback):
+        """Registra `callback(value)`, chamado após cada carga bem-sucedida."""
+        self._listeners.append(callback)
+
+    @property
+    def loaded_at(self):
+        """Momento (datetime local) da última carga bem-sucedida ou da última confirmação de que a fonte não mudou."""
+        return self._loaded_at
+
+    @property
+    def version(self):
+        """Contador de cargas bem-sucedidas; muda sempre que um novo valor passa a ser servido."""
+        return self._version
+
+    @property
+    def last_error(self):
+        """Último erro, se a tentativa mais recente falhou; None caso contrário."""
+        return self._last_error
+
+    @property
+    def is_stale(self):
+        """Indica se o valor servido é anterior a uma tentativa de atualização que falhou."""
+        return self._value is not None and self._last_error is not None
+
+    @property
+    def circuit_open(self):
+        """Indica se o circuito está aberto (tentativas suspensas)."""
+        with self._lock:
+            return self._failures >= self.failure_threshold and time.monotonic() < self._next_attempt
+
+    def age_seconds(self):
+        """Idade, em segundos, do valor servido (None se não houver valor)."""
+        if self._loaded_at is None:
+            return None
+        return (datetime.now() - self._loaded_at).total_seconds()
+
+    def seconds_until_retry(self):
+        """Segundos até a próxima tentativa agendada."""
+        with self._lock:
+            return max(0.0, self._next_attempt - time.monotonic())
+
+    # --- INTERNOS ---
+
+    def _is_due(self):
+        with self._lock:
+            return time.monotonic() >= self._next_attempt
+
+    def _attempt(self):
+        # Só uma tentativa por vez; quem chegar depois reaproveita o resultado
+        with self._fetch_lock:
+            if not self._is_due():
+                return
+            try:
+                # A impressão digital é lida antes da carga: uma mudança durante a carga é vista na próxima
+                source_version = self._fingerprint() if self._fingerprint is not None else None
+                if self._loaded_at is not None and source_version is not None and source_version == self._source_version:
+                    self._record_unchanged()
+                    return
+                value = self._fetch()
+            except Exception as e:
+                self._record_failure(e)
+            else:
+                self._record_success(value, source_version)
+                for callback in list(self._listeners):
+                    try:
+                        callback(value)
+                    except Exception:
+                        logger.exception("Falha em um listener do loader '%s'.", self.name)
+
+    def _record_unchanged(self):
+        with self._lock:
+            self._loaded_at = datetime.now()
+            self._last_error = None
+            self._last_error_at = None
+            self._failures = 0
+            self._next_attempt = time.monotonic() + self.ttl
+
+    def _record_success(self, value, source_version=None):
+        with self._lock:
+            self._value = value
+            self._source_version = source_version
+            self._version += 1
+            self._loaded_at = datetime.now()
+            self._last_error = None
+            self._last_error_at = None
+            self._failures = 0
+            self._next_attempt = time.monotonic() + self.ttl
+
+    def _record_failure(self, error):
+        with self._lock:
+            self._last_error = error
+            self._last_error_at = datetime.now()
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                # Circuito aberto: suspende as tentativas até o fim do cooldown
+                delay = self.cooldown
+            else:
+                delay = min(self.max_backoff, self.base_backoff * 2 ** (self._failures - 1))
+                delay *= random.uniform(0.8, 1.2)
+            self._next_attempt = time.monotonic() + delay
+            failures = self._failures
+        logger.warning(
+            "Falha ao carregar '%s' (%d seguida(s)); nova tentativa em %.0fs: %s",
+            self.name, failures, delay, error,
+        )
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            self._start_worker(self._run)
+
+    def _start_worker(self, target):
+        # Uma única thread por vez: a permanente (_run) ou uma revalidação avulsa (_attempt)
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=target, name=f"loader-{self.name}", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                wait = self._next_attempt - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+                continue
+            self._attempt()
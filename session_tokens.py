@@ -0,0 +1,83 @@
+# session_tokens.py
+import base64
+import hashlib
+import hmac
+import json
+import time
+from datetime import datetime, timedelta, timezone
+import streamlit as st
+import streamlit.components.v1 as components
+
+COOKIE_NAME = "painel_session"
+PASSWORD_MAX_AGE = timedelta(days=15)  # mesma política de reset de auth.verify_login
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+def _timestamp(value):
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+# --- EMISSÃO E VALIDAÇÃO ---
+
+def issue_token(username, last_reset_date, secret, ttl=timedelta(hours=12)):
+    """Gera um token assinado (HMAC-SHA256) para retomar a sessão do usuário.
+
+    O token expira no que vier primeiro: `ttl` a partir de agora ou o fim da
+    validade de 15 dias da senha atual.
+    """
+    now = datetime.now(timezone.utc)
+    expires_at = min(now + ttl, last_reset_date + PASSWORD_MAX_AGE)
+    payload = _b64encode(json.dumps({
+        "u": username,
+        "r": _timestamp(last_reset_date),
+        "e": _timestamp(expires_at),
+    }, separators=(",", ":")).encode("utf-8"))
+    signature = _b64encode(hmac.new(secret, payload.encode("ascii"), hashlib.sha256).digest())
+    return f"{payload}.{signature}"
+
+def verify_token(token, secret):
+    """Valida assinatura e expiração localmente; retorna (username, last_reset_date) ou None."""
+    try:
+        payload, signature = token.split(".")
+        expected = _b64encode(hmac.new(secret, payload.encode("ascii"), hashlib.sha256).digest())
+        if not hmac.compare_digest(signature, expected):
+            return None
+        claims = json.loads(_b64decode(payload))
+        now = time.time()
+        if now >= claims["e"] or now >= claims["r"] + PASSWORD_MAX_AGE.total_seconds():
+            return None
+        return claims["u"], datetime.fromtimestamp(claims["r"], tz=timezone.utc)
+    except Exception:
+        return None
+
+# --- ARMAZENAMENTO NO NAVEGADOR (COOKIE) ---
+
+def read_cookie():
+    """Lê o token enviado pelo navegador na abertura da sessão."""
+    try:
+        return st.context.cookies.get(COOKIE_NAME)
+    except Exception:
+        return None
+
+def _set_cookie(value, max_age):
+    # O iframe do componente compartilha a origem do app, então grava o cookie do painel
+    components.html(f"""
+        <script>
+        parent.document.cookie = "{COOKIE_NAME}={value}; path=/; max-age={max_age}; SameSite=Strict"
+            + (parent.location.protocol === "https:" ? "; Secure" : "");
+        </script>
+    """, height=0)
+
+def store_cookie(token, max_age):
+    """Grava o token no navegador por `max_age` segundos."""
+    _set_cookie(token, int(max_age))
+
+def clear_cookie():
+    """Remove o token do navegador."""
+    _set_cookie("", 0)
@@ -1,10 +1,16 @@
 # setup_initial_user.py (VERSÃO CORRIGIDA - USA INSERT DML)
 import bcrypt
-import toml
 from google.cloud import bigquery
-from google.oauth2 import service_account
 import sys
+import gcp_clients
 import subprocess
+import argparse
+import csv
+import os
+import secrets
+import uuid
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
 
 # --- DADOS DO USUÁRIO INICIAL ---
 INITIAL_USERNAME = "Dados"
@@ -16,16 +22,32 @@ BQ_DATASET = "RBBR_DATA_SCIENCE"
 BQ_USERS_TABLE = "PAINEL_USERS"
 TABLE_ID = f"{GCP_PROJECT_ID}.{BQ_DATASET}.{BQ_USERS_TABLE}"
 
-def hash_password(password):
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+# Arquivo local com as senhas temporárias geradas no provisionamento em lote
+TEMP_PASSWORDS_FILE = "senhas_temporarias.csv"
+
+# Fator de custo padrão do bcrypt (o mesmo de auth.AUTH_DEFAULTS)
+DEFAULT_BCRYPT_ROUNDS = 12
+
+def get_bcrypt_rounds():
+    """Lê o fator de custo da seção [auth] dos segredos, o mesmo usado pelo painel."""
+    try:
+        import toml
+        return int(toml.load(gcp_clients.SECRETS_PATH)["auth"]["bcrypt_rounds"])
+    except Exception:
+        return DEFAULT_BCRYPT_ROUNDS
+
+def hash_password(password, rounds=None):
+    if rounds is None:
+        rounds = get_bcrypt_rounds()
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds))
+
+def hash_password_str(password, rounds):
+    # Função de nível de módulo para poder ser enviada aos processos do pool
+    return hash_password(password, rounds).decode('utf-8')
 
 def get_bq_client_from_secrets():
     try:
-        secrets_path = ".streamlit/secrets.toml"
-        secrets = toml.load(secrets_path)
-        credentials_info = dict(secrets["gcp_service_account"])
-        credentials = service_account.Credentials.from_service_account_info(credentials_info)
-        return bigquery.Client(project=GCP_PROJECT_ID, credentials=credentials)
+        return gcp_clients.get_bq_client(GCP_PROJECT_ID)
     except Exception as e:
         print(f"ERRO: Não foi possível criar o cliente BigQuery. Verifique o seu arquivo '.streamlit/secrets.toml'.")
         print(f"Detalhe do erro: {e}")
@@ -72,10 +94,158 @@ def setup_user():
     except Exception as e:
         print(f"-> ERRO ao inserir usuário via DML: {e}")
 
+# --- PROVISIONAMENTO EM LOTE ---
+
+def generate_temp_password():
+    """Gera uma senha temporária aleatória (trocada no primeiro login)."""
+    return secrets.token_urlsafe(12)
+
+def read_users_csv(csv_path):
+    """Lê o CSV (colunas USERNAME e, opcionalmente, PASSWORD) e remove duplicatas.
+
+    Retorna ({usuário: senha}, duplicados, geradas); usuários sem PASSWORD
+    recebem uma senha temporária aleatória, listada em `geradas`.
+    """
+    users, duplicates, generated = {}, [], set()
+    with open(csv_path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            row = {k.strip().upper(): (v or "").strip() for k, v in row.items() if k}
+            username = row.get("USERNAME", "")
+            if not username:
+                continue
+            if username in users:
+                duplicates.append(username)
+                continue
+            password = row.get("PASSWORD")
+            if not password:
+                password = generate_temp_password()
+                generated.add(username)
+            users[username] = password
+    return users, duplicates, generated
+
+def write_temp_passwords(path, credentials):
+    """Grava os pares (usuário, senha temporária) em um CSV legível apenas pelo dono."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    # Um arquivo já existente mantém o modo antigo no O_CREAT; restringe explicitamente
+    os.fchmod(fd, 0o600)
+    with os.fdopen(fd, "w", newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["USERNAME", "PASSWORD"])
+        writer.writerows(credentials)
+
+def fetch_existing_usernames(client, usernames):
+    """Retorna, em uma única consulta, quais dos usuários já existem na tabela."""
+    query = f"SELECT USERNAME FROM `{TABLE_ID}` WHERE USERNAME IN UNNEST(@usernames)"
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[bigquery.ArrayQueryParameter("usernames", "STRING", list(usernames))]
+    )
+    return {row.USERNAME for row in client.query(query, job_config=job_config)}
+
+def upsert_users(client, rows):
+    """Carrega as linhas em uma tabela de staging e as insere com um único MERGE."""
+    staging_id = f"{TABLE_ID}_STAGING_{uuid.uuid4().hex[:8]}"
+    load_config = bigquery.LoadJobConfig(
+        schema=[
+            bigquery.SchemaField("USERNAME", "STRING"),
+            bigquery.SchemaField("PASSWORD_HASH", "STRING"),
+            bigquery.SchemaField("LAST_RESET_DATE", "TIMESTAMP"),
+            bigquery.SchemaField("FIRST_LOGIN", "BOOL"),
+        ],
+        write_disposition="WRITE_TRUNCATE",
+    )
+    try:
+        client.load_table_from_json(rows, staging_id, job_config=load_config).result()
+        query_merge = f"""
+            MERGE `{TABLE_ID}` T
+            USING `{staging_id}` S
+            ON T.USERNAME = S.USERNAME
+            WHEN NOT MATCHED THEN
+                INSERT (USERNAME, PASSWORD_HASH, LAST_RESET_DATE, FIRST_LOGIN)
+                VALUES (S.USERNAME, S.PASSWORD_HASH, S.LAST_RESET_DATE, S.FIRST_LOGIN)
+        """
+        merge_job = client.query(query_merge)
+        merge_job.result()
+        return merge_job.num_dml_affected_rows or 0
+    finally:
+        client.delete_table(staging_id, not_found_ok=True)
+
+def setup_users_from_csv(csv_path, dry_run=False, workers=None, output_path=TEMP_PASSWORDS_FILE):
+    print(f"Iniciando provisionamento em lote a partir de '{csv_path}'...")
+    users, duplicates, generated = read_users_csv(csv_path)
+    if not users:
+        print("-> Nenhum usuário encontrado no CSV. Nenhuma ação foi tomada.")
+        return
+
+    client = get_bq_client_from_secrets()
+    if client is None: return
+
+    existing = fetch_existing_usernames(client, users)
+    to_insert = [u for u in users if u not in existing]
+    print(f"-> {len(users)} usuários no CSV ({len(duplicates)} linhas duplicadas ignoradas).")
+    print(f"-> {len(existing)} já existem e serão ignorados; {len(to_insert)} serão inseridos.")
+
+    if dry_run:
+        print("-> Dry-run: nenhuma alteração foi feita.")
+        for username in to_insert:
+            print(f"   + {username}")
+        return
+
+    if not to_insert:
+        print("-> Nada a inserir.")
+        return
+
+    # O bcrypt é o gargalo: os hashes são calculados em paralelo, um processo por núcleo
+    print("-> Gerando hashes das senhas...")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        hashes = list(executor.map(
+            hash_password_str, [users[u] for u in to_insert], repeat(get_bcrypt_rounds()), chunksize=8
+        ))
+
+    rows = [
+        {
+            "USERNAME": username,
+            "PASSWORD_HASH": password_hash,
+            "LAST_RESET_DATE": "1970-01-01T00:00:00",
+            "FIRST_LOGIN": True,
+        }
+        for username, password_hash in zip(to_insert, hashes)
+    ]
+
+    # As senhas geradas são gravadas antes da inserção, para nunca criar contas sem credencial conhecida
+    credentials = [(u, users[u]) for u in to_insert if u in generated]
+    if credentials:
+        write_temp_passwords(output_path, credentials)
+        print(f"-> {len(credentials)} senhas temporárias geradas e gravadas em '{output_path}'.")
+
+    try:
+        inserted = upsert_users(client, rows)
+    except Exception as e:
+        print(f"-> ERRO no provisionamento em lote: {e}")
+        if credentials:
+            print(f"   Nenhum usuário foi criado; descarte o arquivo '{output_path}'.")
+        return
+
+    print("-> SUCESSO!")
+    print(f"   Inseridos: {inserted}")
+    print(f"   Ignorados: {len(users) - inserted} (já existentes) + {len(duplicates)} (duplicados no CSV)")
+    if credentials:
+        print(f"   Envie a cada usuário a sua senha temporária de '{output_path}' e apague o arquivo em seguida.")
+
 if __name__ == "__main__":
     try: import toml
     except ImportError:
         print("Biblioteca 'toml' não encontrada. Instalando...")
         subprocess.check_call([sys.executable, "-m", "pip", "install", "toml"])
-    
-    setup_user()
\ No newline at end of file
+
+    parser = argparse.ArgumentParser(description="Cria usuários do painel na tabela PAINEL_USERS.")
+    parser.add_argument("--csv", help="CSV com as colunas USERNAME e, opcionalmente, PASSWORD (senha aleatória se ausente).")
+    parser.add_argument("--dry-run", action="store_true", help="Apenas mostra o que seria inserido.")
+    parser.add_argument("--workers", type=int, default=None, help="Processos para gerar os hashes.")
+    parser.add_argument("--output", default=TEMP_PASSWORDS_FILE,
+                        help="CSV onde são gravadas as senhas temporárias geradas (usuários sem PASSWORD).")
+    args = parser.parse_args()
+
+    if args.csv:
+        setup_users_from_csv(args.csv, dry_run=args.dry_run, workers=args.workers, output_path=args.output)
+    else:
+        setup_user()
\ No newline at end of file
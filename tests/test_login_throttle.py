@@ -0,0 +1,75 @@
+# tests/test_login_throttle.py
+import login_throttle
+from login_throttle import LoginThrottle
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _patch_clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(login_throttle.time, "monotonic", clock)
+    return clock
+
+
+def test_blocks_after_max_attempts_within_window(monkeypatch):
+    _patch_clock(monkeypatch)
+    throttle = LoginThrottle(max_attempts=3, window=60)
+    assert [throttle.allow("ana") for _ in range(4)] == [True, True, True, False]
+    # Outras chaves não são afetadas
+    assert throttle.allow("bob")
+
+
+def test_window_slides(monkeypatch):
+    clock = _patch_clock(monkeypatch)
+    throttle = LoginThrottle(max_attempts=2, window=60)
+    assert throttle.allow("ana")
+    clock.now += 30
+    assert throttle.allow("ana")
+    assert not throttle.allow("ana")
+    # A primeira tentativa sai da janela, a segunda ainda conta
+    clock.now += 31
+    assert throttle.allow("ana")
+    assert not throttle.allow("ana")
+
+
+def test_reset_clears_attempts(monkeypatch):
+    _patch_clock(monkeypatch)
+    throttle = LoginThrottle(max_attempts=1, window=60)
+    assert throttle.allow("ana")
+    assert not throttle.allow("ana")
+    throttle.reset("ana")
+    assert throttle.allow("ana")
+
+
+def test_key_table_is_bounded(monkeypatch):
+    _patch_clock(monkeypatch)
+    throttle = LoginThrottle(max_attempts=3, window=60, max_keys=100)
+    for i in range(1000):
+        throttle.allow(f"usuario{i}")
+    assert len(throttle) == 100
+
+
+def test_recently_used_keys_survive_eviction(monkeypatch):
+    _patch_clock(monkeypatch)
+    throttle = LoginThrottle(max_attempts=1, window=60, max_keys=3)
+    throttle.allow("alvo")
+    for i in range(10):
+        throttle.allow("alvo")  # mantém a chave no fim da ordem LRU
+        throttle.allow(f"spray{i}")
+    assert not throttle.allow("alvo")
+
+
+def test_expired_keys_are_pruned(monkeypatch):
+    clock = _patch_clock(monkeypatch)
+    throttle = LoginThrottle(max_attempts=3, window=60)
+    for i in range(50):
+        throttle.allow(f"usuario{i}")
+    clock.now += 120
+    throttle.allow("novo")
+    assert len(throttle) == 1
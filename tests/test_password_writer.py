@@ -0,0 +1,63 @@
+# tests/test_password_writer.py
+import threading
+import time
+import pytest
+from password_writer import PasswordWriteQueue
+
+
+def test_write_returns_the_stored_reset_date():
+    written = []
+    queue = PasswordWriteQueue(
+        lambda updates: {u: "2026-01-01" for u, _ in updates},
+        on_written=lambda *args: written.append(args),
+    )
+    assert queue.write("ana", "hash") == "2026-01-01"
+    assert written == [("ana", "hash", "2026-01-01")]
+
+
+def test_failure_is_retried_then_raised():
+    calls = []
+
+    def failing(updates):
+        calls.append(updates)
+        raise RuntimeError("MERGE falhou")
+
+    written = []
+    queue = PasswordWriteQueue(failing, on_written=lambda *a: written.append(a), max_attempts=3, base_backoff=0)
+    with pytest.raises(RuntimeError, match="MERGE falhou"):
+        queue.write("ana", "hash")
+    assert len(calls) == 3
+    assert written == []
+    # Nada fica pendente para ser gravado depois de a falha ter sido informada
+    assert queue.flush() == 0
+
+
+def test_unknown_user_fails_only_its_own_write():
+    queue = PasswordWriteQueue(lambda updates: {u: 1 for u, _ in updates if u != "fantasma"})
+    with pytest.raises(LookupError):
+        queue.write("fantasma", "hash")
+    assert queue.write("ana", "hash") == 1
+
+
+def test_concurrent_writes_are_grouped():
+    batches = []
+    first_started = threading.Event()
+
+    def slow(updates):
+        batches.append([u for u, _ in updates])
+        first_started.set()
+        time.sleep(0.2)
+        return {u: 1 for u, _ in updates}
+
+    queue = PasswordWriteQueue(slow)
+    first = threading.Thread(target=queue.write, args=("u0", "h"))
+    first.start()
+    first_started.wait()
+    others = [threading.Thread(target=queue.write, args=(f"u{i}", "h")) for i in range(1, 6)]
+    for t in others:
+        t.start()
+    for t in [first] + others:
+        t.join()
+    assert batches[0] == ["u0"]
+    assert sorted(batches[1]) == [f"u{i}" for i in range(1, 6)]
+    assert len(batches) == 2
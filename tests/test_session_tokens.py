@@ -0,0 +1,57 @@
+# tests/test_session_tokens.py
+from datetime import datetime, timedelta, timezone
+import pytest
+
+pytest.importorskip("streamlit")
+import session_tokens
+
+SECRET = b"segredo-de-teste"
+
+
+def _recent_reset():
+    return datetime.now(timezone.utc) - timedelta(days=1)
+
+
+def test_valid_token_round_trip():
+    reset = _recent_reset()
+    token = session_tokens.issue_token("ana", reset, SECRET)
+    username, token_reset = session_tokens.verify_token(token, SECRET)
+    assert username == "ana"
+    assert int(token_reset.timestamp()) == int(reset.timestamp())
+
+
+def test_tampered_payload_is_rejected():
+    token = session_tokens.issue_token("ana", _recent_reset(), SECRET)
+    payload, signature = token.split(".")
+    forged = session_tokens._b64encode(
+        session_tokens._b64decode(payload).replace(b'"ana"', b'"bob"')
+    )
+    assert session_tokens.verify_token(f"{forged}.{signature}", SECRET) is None
+
+
+def test_tampered_signature_is_rejected():
+    token = session_tokens.issue_token("ana", _recent_reset(), SECRET)
+    payload, signature = token.split(".")
+    flipped = ("A" if signature[0] != "A" else "B") + signature[1:]
+    assert session_tokens.verify_token(f"{payload}.{flipped}", SECRET) is None
+
+
+def test_wrong_secret_is_rejected():
+    token = session_tokens.issue_token("ana", _recent_reset(), SECRET)
+    assert session_tokens.verify_token(token, b"outro-segredo") is None
+
+
+def test_expired_token_is_rejected():
+    token = session_tokens.issue_token("ana", _recent_reset(), SECRET, ttl=timedelta(seconds=-1))
+    assert session_tokens.verify_token(token, SECRET) is None
+
+
+def test_token_expires_with_the_password():
+    old_reset = datetime.now(timezone.utc) - session_tokens.PASSWORD_MAX_AGE - timedelta(minutes=1)
+    token = session_tokens.issue_token("ana", old_reset, SECRET)
+    assert session_tokens.verify_token(token, SECRET) is None
+
+
+@pytest.mark.parametrize("token", ["", "sem-ponto", "a.b.c", "!!!.???"])
+def test_malformed_token_is_rejected(token):
+    assert session_tokens.verify_token(token, SECRET) is None
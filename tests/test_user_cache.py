@@ -0,0 +1,93 @@
+# tests/test_user_cache.py
+from datetime import datetime, timedelta, timezone
+from user_cache import UserCache
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class FakeTable:
+    """Tabela de usuários em memória com o contrato de fetch_rows/fetch_one."""
+
+    def __init__(self, rows):
+        self.rows = {r[0]: r for r in rows}
+        self.since_calls = []
+        self.point_queries = []
+        self.during_fetch = None
+
+    def fetch_rows(self, since):
+        self.since_calls.append(since)
+        rows = [r for r in self.rows.values() if since is None or r[2] >= since]
+        if self.during_fetch is not None:
+            callback, self.during_fetch = self.during_fetch, None
+            callback()
+        return rows
+
+    def fetch_one(self, username):
+        self.point_queries.append(username)
+        row = self.rows.get(username)
+        return row[1:] if row else None
+
+
+def _cache(table, **kwargs):
+    return UserCache(table.fetch_rows, table.fetch_one, **kwargs)
+
+
+def test_known_and_unknown_users_are_served_from_the_snapshot():
+    table = FakeTable([("ana", "h1", T0, False)])
+    cache = _cache(table)
+    assert cache.get("ana") == ("h1", T0, False)
+    for i in range(100):
+        assert cache.get(f"spray{i}") is None
+    assert table.point_queries == []
+
+
+def test_point_query_only_without_snapshot():
+    table = FakeTable([("ana", "h1", T0, False)])
+
+    def failing(since):
+        raise RuntimeError("BigQuery indisponível")
+
+    cache = UserCache(failing, table.fetch_one)
+    assert cache.get("ana") == ("h1", T0, False)
+    assert cache.get("ninguem") is None
+    assert cache.get("ninguem") is None  # cache negativo
+    assert table.point_queries == ["ana", "ninguem"]
+
+
+def test_local_write_survives_an_in_flight_refresh():
+    table = FakeTable([("ana", "antigo", T0, True)])
+    cache = _cache(table)
+    cache.get("ana")
+    new_reset = T0 + timedelta(days=1)
+    # A senha é trocada enquanto a consulta (com o valor antigo) está em andamento
+    table.during_fetch = lambda: cache.put("ana", ("novo", new_reset, False))
+    cache._refresh()
+    assert cache.get("ana") == ("novo", new_reset, False)
+
+
+def test_full_reload_drops_deleted_users():
+    table = FakeTable([("ana", "h1", T0, False), ("bob", "h2", T0, False)])
+    cache = _cache(table, full_reload_interval=0)
+    assert cache.get("bob") is not None
+    del table.rows["bob"]
+    cache._refresh()
+    assert cache.get("bob") is None
+    assert cache.get("ana") is not None
+
+
+def test_incremental_refresh_looks_back_an_overlap():
+    table = FakeTable([("ana", "h1", T0, False)])
+    cache = _cache(table, overlap=timedelta(minutes=5))
+    cache.get("ana")
+    cache._refresh()
+    assert table.since_calls == [None, T0 - timedelta(minutes=5)]
+
+
+def test_incremental_refresh_picks_up_resets():
+    table = FakeTable([("ana", "h1", T0, False)])
+    cache = _cache(table)
+    cache.get("ana")
+    later = T0 + timedelta(hours=1)
+    table.rows["ana"] = ("ana", "h2", later, False)
+    cache._refresh()
+    assert cache.get("ana") == ("h2", later, False)
@@ -0,0 +1,112 @@
+# user_cache.py
+import threading
+import time
+from datetime import timedelta
+from resilient_loader import ResilientLoader
+
+
+class UserCache:
+    """Snapshot local da tabela de usuários para atender logins sem consultar o BigQuery.
+
+    O snapshot é revalidado em segundo plano quando um acesso o encontra com
+    mais de `ttl` segundos (sem logins, nenhuma consulta é feita). A
+    revalidação é incremental (apenas linhas com LAST_RESET_DATE a partir da
+    maior já vista, menos `overlap`, ou seja, trocas de senha) e vira uma
+    recarga completa a cada `full_reload_interval` segundos; é a recarga
+    completa que traz os usuários recém-criados, cujo LAST_RESET_DATE é antigo.
+    A margem `overlap` cobre resets gravados fora de ordem por outros processos.
+
+    Com o snapshot carregado, um nome ausente é respondido localmente, sem
+    consulta ao BigQuery. A consulta pontual `fetch_one` só é usada enquanto
+    nenhum snapshot completo pôde ser carregado, com cache negativo de
+    `negative_ttl` segundos.
+
+    `fetch_rows(since)` deve retornar tuplas (USERNAME, PASSWORD_HASH,
+    LAST_RESET_DATE, FIRST_LOGIN), filtrando por LAST_RESET_DATE >= since
+    quando `since` não for None. `fetch_one(username)` retorna a tupla
+    (PASSWORD_HASH, LAST_RESET_DATE, FIRST_LOGIN) ou None.
+    """
+
+    def __init__(self, fetch_rows, fetch_one, ttl=30, full_reload_interval=300, negative_ttl=60,
+                 overlap=timedelta(minutes=5)):
+        self._fetch_rows = fetch_rows
+        self._fetch_one = fetch_one
+        self.full_reload_interval = full_reload_interval
+        self.negative_ttl = negative_ttl
+        self.overlap = overlap
+
+        self._lock = threading.Lock()
+        self._records = {}
+        self._missing = {}       # username -> instante (monotonic) de expiração
+        self._written = {}       # username -> instante (monotonic) da última gravação local
+        self._watermark = None
+        self._full_loaded_at = None
+
+        self._loader = ResilientLoader("usuários", self._refresh, ttl=ttl, refresh_on_access=True)
+
+    def get(self, username):
+        """Retorna (PASSWORD_HASH, LAST_RESET_DATE, FIRST_LOGIN) do usuário, ou None."""
+        self._loader.get()
+
+        with self._lock:
+            record = self._records.get(username)
+            if record is not None:
+                return record
+            if self._full_loaded_at is not None:
+                # Snapshot completo carregado: nome ausente é usuário inexistente
+                return None
+            expires_at = self._missing.get(username)
+            if expires_at is not None and time.monotonic() < expires_at:
+                return None
+
+        # Sem snapshot (BigQuery indisponível na primeira carga)
+        record = self._fetch_one(username)
+        if record is not None:
+            record = tuple(record)
+        with self._lock:
+            if record is None:
+                self._missing[username] = time.monotonic() + self.negative_ttl
+            else:
+                self._records[username] = record
+                self._missing.pop(username, None)
+        return record
+
+    def put(self, username, record):
+        """Grava um registro conhecido localmente (por exemplo, uma senha recém-alterada)."""
+        with self._lock:
+            self._records[username] = tuple(record)
+            self._missing.pop(username, None)
+            # Uma carga em andamento não pode sobrescrevê-lo com a versão antiga
+            self._written[username] = time.monotonic()
+
+    def _refresh(self):
+        started_at = time.monotonic()
+        with self._lock:
+            full = (
+                self._full_loaded_at is None
+                or started_at - self._full_loaded_at >= self.full_reload_interval
+            )
+            since = None if full or self._watermark is None else self._watermark - self.overlap
+
+        rows = [tuple(row) for row in self._fetch_rows(since)]
+
+        with self._lock:
+            # Registros gravados localmente durante a consulta não podem ser sobrescritos por ela
+            skip = {u for u, at in self._written.items() if at >= started_at}
+            records = {} if full else self._records
+            if full:
+                records.update({u: r for u, r in self._records.items() if u in skip})
+            for username, password_hash, last_reset_date, first_login in rows:
+                if username in skip:
+                    continue
+                records[username] = (password_hash, last_reset_date, first_login)
+                self._missing.pop(username, None)
+                if self._watermark is None or last_reset_date > self._watermark:
+                    self._watermark = last_reset_date
+            self._records = records
+            self._written = {u: at for u, at in self._written.items() if at >= started_at}
+            if full:
+                self._full_loaded_at = started_at
+                # O snapshot completo passa a responder pelos ausentes
+                self._missing = {}
+        return len(rows)